@@ -1,13 +1,49 @@
 import os
 
-from .fwf import fwf_to_csv, generate_fwf_file
+from .fwf import (  # isort:skip
+    csv_to_fwf,  # isort:skip
+    diff_fwf,  # isort:skip
+    fwf_to_csv,  # isort:skip
+    fwf_to_sqlite,  # isort:skip
+    generate_fwf_file,  # isort:skip
+    infer_spec,  # isort:skip
+    profile_fwf,  # isort:skip
+)
 
 SAMPLE_OUTPUT = "./sample_output.csv"
 SAMPLE_INPUT = "./sample_fwf.txt"
+SAMPLE_FWF_OUTPUT = "./sample_output.txt"
+SAMPLE_DB_OUTPUT = "./sample_output.db"
+SAMPLE_PROFILE_OUTPUT = "./sample_profile.json"
+DIRECTIONS = ["csv", "fwf", "sqlite"]
 
 
-def main(spec, fwf=None, output=None, delimiter="\t"):
+def main(
+    spec,
+    fwf=None,
+    output=None,
+    delimiter="\t",
+    to="csv",
+    csv=None,
+    infer=False,
+    table="fwf",
+    diff=None,
+    key=None,
+    profile=False,
+    processes=1,
+    partition_by=None,
+    max_rows_per_file=None,
+    max_bytes_per_file=None,
+    dedupe=False,
+    dedupe_keys=None,
+):
     """Parse fixed width files, convert them to csv and write them to 'output'
+    or, with to="fwf", convert a csv to a fixed width file
+    or, with to="sqlite", load them into 'table' of the sqlite database 'output'
+    or, with infer=True, infer the specs of 'fwf' and write them to 'spec'
+    or, with diff, write the records inserted, deleted and updated from the old snapshot
+    'diff' to 'fwf' to the directory 'output'
+    or, with profile=True, write statistics of each column of 'fwf' to 'output' (json)
 
     Args:
         spec (str): path to json file describing the specs for fixed width file.
@@ -20,7 +56,65 @@ def main(spec, fwf=None, output=None, delimiter="\t"):
                       Then output's written to a file called "sample_output.csv";
                        in the same directory as spec.
         delimiter (str, optional): field delimiter for csv's/outputs. Defaults to "\t".
+        to (str, optional): "csv" to convert fwf to csv, "fwf" to convert csv to fwf,
+                            "sqlite" to load fwf into sqlite. Defaults to "csv".
+        csv (str, optional): path to csv file to convert when to="fwf". Defaults to None.
+        infer (bool, optional): infer specs of fwf and write them to spec. Defaults to False.
+        table (str, optional): sqlite table to load fwf into. Defaults to "fwf".
+        diff (str, optional): path to an old snapshot of fwf to diff fwf with.
+                              Defaults to None.
+        key (list[str], optional): key columns of records to diff. Defaults to None.
+        profile (bool, optional): profile columns of fwf. Defaults to False.
+        processes (int, optional): number of processes to profile with. Defaults to 1.
+        partition_by (list[str], optional): columns to partition the csv on, output is
+                                            then a directory. Defaults to None.
+        max_rows_per_file (int, optional): rows per csv part file. Defaults to None.
+        max_bytes_per_file (int, optional): bytes per csv part file. Defaults to None.
+        dedupe (bool, optional): drop duplicate records from the csv. Defaults to False.
+        dedupe_keys (list[str], optional): columns identifying duplicate records.
+                                           Defaults to None.
+
+    Returns:
+        counts[dict]: with diff, number of inserted, deleted and updated records
     """
+    if diff is not None:
+        if fwf is None:
+            raise ValueError("path to fwf should be given to diff it")
+        output = output or "."
+        os.makedirs(output, exist_ok=True)
+        return diff_fwf(
+            spec_path=spec,
+            old_path=diff,
+            new_path=fwf,
+            key=key,
+            inserts_path=os.path.join(output, "inserts.txt"),
+            deletes_path=os.path.join(output, "deletes.txt"),
+            updates_path=os.path.join(output, "updates.txt"),
+        )
+    if profile:
+        if fwf is None:
+            raise ValueError("path to fwf should be given to profile it")
+        profile_fwf(
+            spec_path=spec,
+            fwf_path=fwf,
+            json_path=output or SAMPLE_PROFILE_OUTPUT,
+            processes=processes,
+        )
+        return
+    if infer:
+        if fwf is None:
+            raise ValueError("path to fwf should be given to infer its specs")
+        infer_spec(fwf_path=fwf, spec_path=spec)
+        return
+    if to not in DIRECTIONS:
+        raise ValueError(f"to can only be: {DIRECTIONS}")
+    if to == "fwf":
+        if csv is None:
+            raise ValueError("path to csv should be given to convert it to fwf")
+        if output is None:
+            output = SAMPLE_FWF_OUTPUT
+        csv_to_fwf(spec_path=spec, csv_path=csv, fwf_path=output, sep=delimiter)
+        return
     if fwf is None:
         fwf = SAMPLE_INPUT
         generate_fwf_file(spec_path=spec, fwf_path=fwf, length=10)
@@ -32,10 +126,28 @@ def main(spec, fwf=None, output=None, delimiter="\t"):
     #  So if we want to treat  size==0 as the user asking us to generate a random fwf then
     # elif os.stat(fwf).st_size == 0:
     #     generate_fwf_file(spec_path=spec, fwf_path=fwf, length=10)
+    if to == "sqlite":
+        fwf_to_sqlite(
+            spec_path=spec,
+            fwf_path=fwf,
+            db_path=output or SAMPLE_DB_OUTPUT,
+            table=table,
+        )
+        return
     if output is None:
         output = SAMPLE_OUTPUT
 
-    fwf_to_csv(spec_path=spec, fwf_path=fwf, csv_path=output, sep=delimiter)
+    fwf_to_csv(
+        spec_path=spec,
+        fwf_path=fwf,
+        csv_path=output,
+        sep=delimiter,
+        partition_by=partition_by,
+        max_rows_per_file=max_rows_per_file,
+        max_bytes_per_file=max_bytes_per_file,
+        dedupe=dedupe,
+        dedupe_keys=dedupe_keys,
+    )
     return
 
 
@@ -68,14 +180,109 @@ if __name__ == "__main__":
         "-o",
         "--output",
         default=None,
-        help='Path to output CSV file (default "./sample_output.csv")',
+        help='Path to output CSV file (default "./sample_output.csv"), \
+        or output fwf file with "--to fwf" (default "./sample_output.txt")',
+    )
+    argp.add_argument(
+        "-t",
+        "--to",
+        choices=DIRECTIONS,
+        default="csv",
+        help='Convert fwf to "csv" (default), csv to "fwf" or load fwf into "sqlite"',
+    )
+    argp.add_argument(
+        "-c", "--csv", default=None, help='Path to CSV file to convert with "--to fwf"',
+    )
+    argp.add_argument(
+        "--table",
+        default="fwf",
+        help='Table to load fwf into with "--to sqlite" (default "fwf")',
+    )
+    argp.add_argument(
+        "-i",
+        "--infer",
+        action="store_true",
+        help="Infer specs of the fwf data file (-f) and write them to the spec file (-s)",
+    )
+
+    argp.add_argument(
+        "--diff",
+        default=None,
+        help="Path to an old snapshot of the fwf data file (-f) to diff it with, \
+        inserts/deletes/updates are written to the output directory (-o, default .)",
+    )
+    argp.add_argument(
+        "-k",
+        "--key",
+        nargs="+",
+        default=None,
+        help="Key columns identifying records with --diff (default - whole records)",
+    )
+    argp.add_argument(
+        "-p",
+        "--profile",
+        action="store_true",
+        help='Profile columns of the fwf data file (-f) and write them as json \
+        to the output (default "./sample_profile.json")',
+    )
+    argp.add_argument(
+        "-j",
+        "--processes",
+        type=int,
+        default=1,
+        help="Number of processes to profile with, 0 for all cpus (default 1)",
+    )
+    argp.add_argument(
+        "--partition-by",
+        nargs="+",
+        default=None,
+        help="Columns to partition the CSV output on (Hive style column=value \
+        directories), the output is then a directory",
+    )
+    argp.add_argument(
+        "--max-rows-per-file",
+        type=int,
+        default=None,
+        help="Roll the CSV output over to a new part file every so many rows",
+    )
+    argp.add_argument(
+        "--max-bytes-per-file",
+        type=int,
+        default=None,
+        help="Roll the CSV output over to a new part file every so many bytes",
+    )
+    argp.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="Drop duplicate records from the CSV output, keeping the first one",
+    )
+    argp.add_argument(
+        "--dedupe-keys",
+        nargs="+",
+        default=None,
+        help="Columns identifying duplicate records (default - whole records)",
     )
 
     options = argp.parse_args()
     print(options)
-    main(
+    counts = main(
         spec=options.spec,
         fwf=options.fwf,
         output=options.output,
         delimiter=options.delimiter,
+        to=options.to,
+        csv=options.csv,
+        infer=options.infer,
+        table=options.table,
+        diff=options.diff,
+        key=options.key,
+        profile=options.profile,
+        processes=options.processes or None,
+        partition_by=options.partition_by,
+        max_rows_per_file=options.max_rows_per_file,
+        max_bytes_per_file=options.max_bytes_per_file,
+        dedupe=options.dedupe,
+        dedupe_keys=options.dedupe_keys,
     )
+    if counts is not None:
+        print(counts)
@@ -0,0 +1,178 @@
+import heapq
+import os
+import struct
+import tempfile
+from itertools import chain, islice
+
+from .records import (  # isort:skip
+    BYTES_PER_KEY,  # isort:skip
+    DIGEST_SIZE,  # isort:skip
+    _header_record,  # isort:skip
+    _lazy_read_raw_records,  # isort:skip
+    _read_partition,  # isort:skip
+    _record_key,  # isort:skip
+    _skip_header,  # isort:skip
+    _spill_partitions,  # isort:skip
+)
+from .utils import (  # isort:skip
+    BYTES_PER_BLOCK,  # isort:skip
+    RECORDS_PER_BLOCK,  # isort:skip
+    _fwf_layout,  # isort:skip
+    _lazy_read_fwf,  # isort:skip
+    _open_fwf_source,  # isort:skip
+)
+
+# memory (in bytes) the fingerprints of records seen can take before spilling
+DEDUPE_MEMORY_LIMIT = 256 * 1024 * 1024
+# sequence number prefixed to spilled records, to merge them back in their order
+_SEQ = struct.Struct(">Q")
+# frame of records kept after spilling: record length
+_LENGTH = struct.Struct(">I")
+
+
+def _write_kept(records, path):
+    """Writes (sequence numbered) records kept from a partition to a file"""
+    with open(path, "wb") as kept:
+        for record in records:
+            kept.write(_LENGTH.pack(len(record)) + record)
+    return path
+
+
+def _read_kept(path):
+    """Reads back records written by _write_kept"""
+    with open(path, "rb", buffering=BYTES_PER_BLOCK) as kept:
+        while True:
+            frame = kept.read(_LENGTH.size)
+            if not frame:
+                return
+            (length,) = _LENGTH.unpack(frame)
+            yield kept.read(length)
+
+
+def _unique_records(pairs, max_keys, directory=None, depth=0, seen=None):
+    """Drops (key fingerprint, raw record) pairs whose key was already seen, keeping the
+    first one. Once max_keys keys are seen, they and the rest of pairs are spilled to
+    disk partitioned by key fingerprint and each partition is deduped on its own
+    (spilling again if needed). Spilled records are numbered and the ones kept from
+    each partition merged back by number, so records come out in the order of pairs
+
+    Args:
+        pairs (iterator): (key fingerprint, raw record) pairs
+        max_keys (int): number of keys that fit in memory
+        directory (str, optional): (temporary) directory of the partitions.
+                                   Defaults to None, created when spilling.
+        depth (int, optional): byte of the fingerprint partitioned on. Defaults to 0.
+        seen (set, optional): keys already seen. Defaults to None.
+
+    Raises:
+        ValueError: if keys of a partition still do not fit once fully partitioned
+
+    Yields:
+        record[bytes]: raw record of each key, first one seen
+    """
+    seen = set() if seen is None else seen
+    pairs = iter(pairs)
+    for key, record in pairs:
+        if key in seen:
+            continue
+        seen.add(key)
+        yield record
+        if len(seen) >= max_keys:
+            break
+    else:
+        return
+    if depth >= DIGEST_SIZE:
+        raise ValueError("Too many distinct keys in a partition to dedupe in memory")
+    if directory is None:
+        with tempfile.TemporaryDirectory() as directory:
+            yield from _unique_records(pairs, max_keys, directory, depth, seen)
+        return
+    seen_paths = _spill_partitions(
+        ((key, b"") for key in seen), directory, "seen", depth
+    )
+    seen = None
+    rest_paths = _spill_partitions(
+        ((key, _SEQ.pack(seq) + record) for seq, (key, record) in enumerate(pairs)),
+        directory,
+        "rest",
+        depth,
+    )
+    kept_paths = [
+        _write_kept(
+            _unique_records(
+                pairs=_read_partition(rest_path),
+                max_keys=max_keys,
+                directory=directory,
+                depth=depth + 1,
+                seen={key for key, _ in _read_partition(seen_path)},
+            ),
+            os.path.join(directory, f"kept.{depth}.{nb}"),
+        )
+        for nb, (seen_path, rest_path) in enumerate(zip(seen_paths, rest_paths))
+    ]
+    # NOTE sequence numbers are big endian, records sort by them as bytes
+    for record in heapq.merge(*(_read_kept(path) for path in kept_paths)):
+        yield record[_SEQ.size :]  # noqa: E203
+    return
+
+
+def _lazy_read_fwf_unique(fwf_path, fwf_specs, key=None):
+    """Reads an fwf file dropping duplicate records (by key columns or whole records):
+    raw records are deduped on their fingerprints before being parsed, the fingerprints
+    are spilled to disk past DEDUPE_MEMORY_LIMIT bytes
+
+    Args:
+        fwf_path (str, bytes, memoryview, file): path to fwf file, its content
+                                                 or a binary file object
+        fwf_specs (dict): validated specs
+        key (list[str], optional): names of the columns identifying a record, None to
+                                   dedupe whole records. Defaults to None.
+
+    Raises:
+        ValueError: if a key column is not in the spec's ColumnNames
+
+    Returns:
+        rows[chain]: generator of header + unique data
+    """
+    layout = _fwf_layout(
+        offsets=fwf_specs["Offsets"],
+        padding_char=fwf_specs["PaddingCharacter"],
+        encoding=fwf_specs["FixedWidthEncoding"],
+        column_types=fwf_specs["ColumnTypes"],
+        scales=fwf_specs["ColumnScales"],
+        terminator=fwf_specs["RecordTerminator"],
+        width_unit=fwf_specs["WidthUnit"],
+    )
+    columnNames = fwf_specs["ColumnNames"]
+    key_of = _record_key(layout, columnNames, key)
+    records = _skip_header(
+        _lazy_read_raw_records(_open_fwf_source(fwf_path), layout),
+        _header_record(layout, columnNames),
+    )
+    records = _unique_records(
+        ((key_of(record), record) for record in records),
+        max(1, DEDUPE_MEMORY_LIMIT // BYTES_PER_KEY),
+    )
+
+    def rows():
+        # NOTE unique records are parsed back a block at a time by the usual readers
+        terminator = layout["terminator"]
+        while True:
+            block = list(islice(records, RECORDS_PER_BLOCK))
+            if not block:
+                break
+            parsed = _lazy_read_fwf(
+                fwf_path=terminator.join(block) + terminator,
+                encoding=fwf_specs["FixedWidthEncoding"],
+                offsets=fwf_specs["Offsets"],
+                padding_char=fwf_specs["PaddingCharacter"],
+                columnNames=columnNames,
+                column_types=fwf_specs["ColumnTypes"],
+                scales=fwf_specs["ColumnScales"],
+                terminator=fwf_specs["RecordTerminator"],
+                width_unit=fwf_specs["WidthUnit"],
+            )
+            next(parsed)
+            yield from parsed
+
+    return chain([columnNames], rows())
@@ -0,0 +1,128 @@
+import os
+import tempfile
+from contextlib import ExitStack
+
+from .records import (  # isort:skip
+    BYTES_PER_KEY,  # isort:skip
+    DIGEST_SIZE,  # isort:skip
+    _fingerprint,  # isort:skip
+    _read_partition,  # isort:skip
+    _spill_partitions,  # isort:skip
+)
+from .utils import _open_sink  # isort:skip
+
+# memory (in bytes) the fingerprints of the old snapshot can take before spilling
+DIFF_MEMORY_LIMIT = 256 * 1024 * 1024
+DIFF_OUTPUTS = ["inserts", "deletes", "updates"]
+
+
+def _diff_in_memory(old, new, outputs, terminator, keyed, max_keys):
+    """Diffs (key fingerprint, raw record) pairs of old and new snapshots in memory
+
+    Args:
+        old (callable): returns the pairs of the old snapshot, called twice
+        new (callable): returns the pairs of the new snapshot
+        outputs (dict): opened file and count of each of DIFF_OUTPUTS
+        terminator (bytes): record terminator
+        keyed (bool): whether keys are key columns (else the whole record)
+        max_keys (int): number of keys that fit in memory
+
+    Returns:
+        bool: False if old has more than max_keys keys and nothing was written
+    """
+    seen = {}
+    for key, record in old():
+        seen[key] = _fingerprint(record) if keyed else True
+        if len(seen) > max_keys:
+            return False
+    for key, record in new():
+        before = seen.pop(key, None)
+        if before is None:
+            _write(outputs, "inserts", record + terminator)
+        elif keyed and before != _fingerprint(record):
+            _write(outputs, "updates", record + terminator)
+    if seen:
+        for key, record in old():
+            if key in seen:
+                _write(outputs, "deletes", record + terminator)
+    return True
+
+
+def _write(outputs, kind, record):
+    outputs[kind]["file"].write(record)
+    outputs[kind]["count"] += 1
+    return
+
+
+def _diff_pairs(old, new, outputs, terminator, keyed, max_keys, directory, depth=0):
+    """Diffs old and new snapshots in memory, or if the keys of old do not fit, spills
+    both to disk partitioned by key fingerprint and diffs each partition pair
+    (spilling again if a partition does not fit)
+    """
+    if _diff_in_memory(old, new, outputs, terminator, keyed, max_keys):
+        return
+    if depth >= DIGEST_SIZE:
+        raise ValueError("Too many distinct keys in a partition to diff in memory")
+    old_paths = _spill_partitions(old(), directory, "old", depth)
+    new_paths = _spill_partitions(new(), directory, "new", depth)
+    for old_path, new_path in zip(old_paths, new_paths):
+        _diff_pairs(
+            lambda path=old_path: _read_partition(path),
+            lambda path=new_path: _read_partition(path),
+            outputs,
+            terminator,
+            keyed,
+            max_keys,
+            directory,
+            depth + 1,
+        )
+        os.remove(old_path)
+        os.remove(new_path)
+    return
+
+
+def diff_records(
+    old,
+    new,
+    inserts_path,
+    deletes_path,
+    updates_path,
+    terminator=b"\n",
+    header_record=None,
+    keyed=True,
+    memory_limit=DIFF_MEMORY_LIMIT,
+    spill_dir=None,
+):
+    """Diffs two snapshots given as (key fingerprint, raw record) pairs and writes the
+    inserted, deleted and updated records to separate fwf outputs
+
+    Args:
+        old (callable): returns the pairs of the old snapshot, can be called several times
+        new (callable): returns the pairs of the new snapshot, can be called several times
+        inserts_path (str, file): output for records whose key is only in new
+        deletes_path (str, file): output for records whose key is only in old
+        updates_path (str, file): output for records whose key is in both but changed
+        terminator (bytes, optional): record terminator. Defaults to b"\n".
+        header_record (bytes, optional): header written first to each output. Defaults to None.
+        keyed (bool, optional): whether keys are key columns, else the whole record is the key
+                                and there are no updates. Defaults to True.
+        memory_limit (int, optional): memory (bytes) fingerprints can take before spilling.
+                                      Defaults to DIFF_MEMORY_LIMIT.
+        spill_dir (str, optional): directory to spill partitions to. Defaults to None (tmp).
+
+    Returns:
+        counts[dict]: number of records written to each of DIFF_OUTPUTS
+    """
+    max_keys = max(1, memory_limit // BYTES_PER_KEY)
+    paths = dict(zip(DIFF_OUTPUTS, [inserts_path, deletes_path, updates_path]))
+    with ExitStack() as stack:
+        outputs = {
+            kind: {"file": stack.enter_context(_open_sink(path)), "count": 0}
+            for kind, path in paths.items()
+        }
+        if header_record is not None:
+            for output in outputs.values():
+                output["file"].write(header_record + terminator)
+        directory = stack.enter_context(tempfile.TemporaryDirectory(dir=spill_dir))
+        _diff_pairs(old, new, outputs, terminator, keyed, max_keys, directory)
+    return {kind: output["count"] for kind, output in outputs.items()}
@@ -1,60 +1,385 @@
+import io
+import json
+import os
+import random
+import sys
+from functools import partial
+from itertools import islice
+
+from .dedupe import _lazy_read_fwf_unique
+from .diff import DIFF_MEMORY_LIMIT, diff_records
+from .infer import _infer_layout
+from .parallel import data_to_fwf_parallel, generate_fwf_file_parallel
+from .profiling import profile_records
+from .records import _header_record, _keyed_records, _record_key
 from .utils import (  # isort:skip
+    _fixed_record_length,  # isort:skip
+    _fwf_layout,  # isort:skip
     _lazy_generate_fwf,  # isort:skip
+    _lazy_read_csv,  # isort:skip
     _lazy_read_fwf,  # isort:skip
+    _open_fwf_source,  # isort:skip
     data_to_csv,  # isort:skip
     data_to_fwf,  # isort:skip
+    data_to_sqlite,  # isort:skip
+    EBCDIC_ENCODINGS,  # isort:skip
+    MULTIBYTE_ENCODINGS,  # isort:skip
+    SUPPORTED_ENCODINGS,  # isort:skip
     parse_spec_file,  # isort:skip
 )
 
+# read buffer of csv files streamed into fwf
+CSV_BUFFER_SIZE = 1 << 20
+# number of bytes sampled (in total) to infer specs
+SAMPLE_BYTES = 1 << 22
+
 
-def read_fwf(spec_path, fwf_path, *args, **kwargs):
+def read_fwf(spec_path, fwf_path, *args, dedupe=False, dedupe_keys=None, **kwargs):
     """Takes specs and fwf file, parses it and returns a generator with parsed data
 
     Args:
-        spec_path (str): path to fwf spec file
-        fwf_path (str): path to fwf file
+        spec_path (str, dict, bytes, file): path to fwf spec file, see parse_spec_file
+        fwf_path (str, bytes, memoryview, file): path to fwf file, its content
+                                                 or a binary file object
+        dedupe (bool, optional): drop duplicate records, keeping the first one.
+                                 Defaults to False.
+        dedupe_keys (list[str], optional): columns identifying duplicate records (implies
+                                           dedupe), None for whole records. Defaults to None.
 
     Returns:
         rows [generator]: returns a generate with rows parsed from fwf file
     """
     fwf_specs = parse_spec_file(spec=spec_path)
+    if dedupe or dedupe_keys:
+        return _lazy_read_fwf_unique(
+            fwf_path=fwf_path, fwf_specs=fwf_specs, key=dedupe_keys
+        )
     rows = _lazy_read_fwf(
         fwf_path=fwf_path,
         encoding=fwf_specs["FixedWidthEncoding"],
         offsets=fwf_specs["Offsets"],
         padding_char=fwf_specs["PaddingCharacter"],
         columnNames=fwf_specs["ColumnNames"],
+        column_types=fwf_specs["ColumnTypes"],
+        scales=fwf_specs["ColumnScales"],
+        terminator=fwf_specs["RecordTerminator"],
+        width_unit=fwf_specs["WidthUnit"],
     )
     return rows
 
 
-def fwf_to_csv(spec_path, fwf_path, csv_path, sep="\t"):
-    """Takes specs, fwf, csv_path, reads fwf and converts to csv
+def fwf_to_csv(
+    spec_path,
+    fwf_path,
+    csv_path,
+    sep="\t",
+    partition_by=None,
+    max_rows_per_file=None,
+    max_bytes_per_file=None,
+    dedupe=False,
+    dedupe_keys=None,
+):
+    """Takes specs, fwf, csv_path, reads fwf and converts to csv, or to csv part files
+    in the csv_path directory partitioned by column values and/or rolled over by size
 
     Args:
-        spec_path (str): path to fwf spec file
-        fwf_path (str): path to fwf file
-        csv_path (str): path to csv file to write
+        spec_path (str, dict, bytes, file): path to fwf spec file, see parse_spec_file
+        fwf_path (str, bytes, memoryview, file): path to fwf file, its content
+                                                 or a binary file object
+        csv_path (str, file): path to csv file to write or a writable binary file object,
+                              the (empty) directory to write part files to when
+                              partitioning
         sep (str, optional): delimiter used in the csv file Defaults to "\t".
+        partition_by (list[str], optional): columns to partition rows on, into Hive style
+                                            column=value directories. Defaults to None.
+        max_rows_per_file (int, optional): rows after which a part file is rolled over.
+                                           Defaults to None.
+        max_bytes_per_file (int, optional): bytes after which a part file is rolled over.
+                                            Defaults to None.
+        dedupe (bool, optional): drop duplicate records, keeping the first one.
+                                 Defaults to False.
+        dedupe_keys (list[str], optional): columns identifying duplicate records (implies
+                                           dedupe), None for whole records. Defaults to None.
     """
     fwf_specs = parse_spec_file(spec=spec_path)
-    rows = read_fwf(spec_path=spec_path, fwf_path=fwf_path)
+    rows = read_fwf(
+        spec_path=fwf_specs,
+        fwf_path=fwf_path,
+        dedupe=dedupe,
+        dedupe_keys=dedupe_keys,
+    )
     data_to_csv(
         data=rows,
         csv_path=csv_path,
         header=fwf_specs["IncludeHeader"],
         sep=sep,
         encoding=fwf_specs["DelimitedEncoding"],
+        partition_by=partition_by,
+        max_rows_per_file=max_rows_per_file,
+        max_bytes_per_file=max_bytes_per_file,
+    )
+    return
+
+
+def fwf_to_sqlite(spec_path, fwf_path, db_path, table, if_exists="append"):
+    """Takes specs, fwf, db_path, table, reads fwf and bulk loads it into a sqlite table,
+    created from the spec's ColumnNames (and ColumnTypes)
+
+    Args:
+        spec_path (str, dict, bytes, file): path to fwf spec file, see parse_spec_file
+        fwf_path (str, bytes, memoryview, file): path to fwf file, its content
+                                                 or a binary file object
+        db_path (str, sqlite3.Connection): path to sqlite database or an open connection
+        table (str): name of the table to load into
+        if_exists (str, optional): "append" to, "replace" or "fail" on an existing table.
+                                   Defaults to "append".
+    """
+    fwf_specs = parse_spec_file(spec=spec_path)
+    rows = read_fwf(spec_path=fwf_specs, fwf_path=fwf_path)
+    data_to_sqlite(
+        data=rows,
+        db_path=db_path,
+        table=table,
+        column_types=fwf_specs["ColumnTypes"],
+        scales=fwf_specs["ColumnScales"],
+        if_exists=if_exists,
+        offsets=fwf_specs["Offsets"],
+    )
+    return
+
+
+def csv_to_fwf(spec_path, csv_path, fwf_path, sep="\t", quotechar=None, header=True):
+    """Takes specs, csv, fwf_path, streams the csv and converts it to fwf,
+    csv columns are mapped onto the spec's ColumnNames by their header name
+    and blank csv lines are skipped
+
+    Args:
+        spec_path (str, dict, bytes, file): path to fwf spec file, see parse_spec_file
+        csv_path (str, bytes, memoryview, file): path to csv file to read, its content
+                                                 or a binary file object
+        fwf_path (str, file): path to fwf file to write or a writable binary file object
+        sep (str, optional): delimiter used in the csv file. Defaults to "\t".
+        quotechar (str, optional): quote character of the csv,
+                                   None if fields are not quoted. Defaults to None.
+        header (bool, optional): whether the csv starts with a header, columns are mapped
+                                 by position without one. Defaults to True.
+    """
+    fwf_specs = parse_spec_file(spec=spec_path)
+    rows = _lazy_read_csv(
+        csv_file=io.TextIOWrapper(
+            io.BufferedReader(_open_fwf_source(csv_path), CSV_BUFFER_SIZE),
+            encoding=fwf_specs["DelimitedEncoding"],
+            newline="",
+        ),
+        columnNames=fwf_specs["ColumnNames"],
+        sep=sep,
+        quotechar=quotechar,
+        header=header,
+    )
+    data_to_fwf(
+        data=rows,
+        fwf_path=fwf_path,
+        offsets=fwf_specs["Offsets"],
+        header=fwf_specs["IncludeHeader"],
+        padding_char=fwf_specs["PaddingCharacter"],
+        encoding=fwf_specs["FixedWidthEncoding"],
+        column_types=fwf_specs["ColumnTypes"],
+        scales=fwf_specs["ColumnScales"],
+        terminator=fwf_specs["RecordTerminator"],
+        width_unit=fwf_specs["WidthUnit"],
     )
     return
 
 
-def generate_fwf_data(spec_path, length=None):
+def diff_fwf(
+    spec_path,
+    old_path,
+    new_path,
+    key=None,
+    inserts_path="inserts.txt",
+    deletes_path="deletes.txt",
+    updates_path="updates.txt",
+    memory_limit=DIFF_MEMORY_LIMIT,
+    spill_dir=None,
+):
+    """Takes specs, an old and a new snapshot of an fwf file and writes the records
+    inserted, deleted and updated between them to separate fwf files. Records are not
+    parsed: fingerprints of their raw bytes (and of their key columns) are compared,
+    and both snapshots are spilled to disk partitions if the keys do not fit in memory
+
+    Args:
+        spec_path (str, dict, bytes, file): path to fwf spec file, see parse_spec_file
+        old_path (str, bytes, memoryview, file): old snapshot, a path, its content
+                                                 or a seekable binary file object
+        new_path (str, bytes, memoryview, file): new snapshot, a path, its content
+                                                 or a seekable binary file object
+        key (list[str], optional): names of the columns identifying a record, None to
+                                   identify records by all their bytes (no updates then).
+                                   Defaults to None.
+        inserts_path (str, file): output of records only in new. Defaults to "inserts.txt".
+        deletes_path (str, file): output of records only in old. Defaults to "deletes.txt".
+        updates_path (str, file): output of changed records (as in new).
+                                  Defaults to "updates.txt".
+        memory_limit (int, optional): memory (bytes) fingerprints can take before spilling.
+                                      Defaults to DIFF_MEMORY_LIMIT.
+        spill_dir (str, optional): directory to spill partitions to. Defaults to None (tmp).
+
+    Raises:
+        ValueError: if a key column is not in the spec's ColumnNames
+
+    Returns:
+        counts[dict]: number of inserted, deleted and updated records
+    """
+    fwf_specs = parse_spec_file(spec=spec_path)
+    layout = _fwf_layout(
+        offsets=fwf_specs["Offsets"],
+        padding_char=fwf_specs["PaddingCharacter"],
+        encoding=fwf_specs["FixedWidthEncoding"],
+        column_types=fwf_specs["ColumnTypes"],
+        scales=fwf_specs["ColumnScales"],
+        terminator=fwf_specs["RecordTerminator"],
+        width_unit=fwf_specs["WidthUnit"],
+    )
+    columnNames = fwf_specs["ColumnNames"]
+    key_of = _record_key(layout, columnNames, key)
+    header_record = _header_record(layout, columnNames)
+    return diff_records(
+        old=_keyed_records(old_path, layout, columnNames, key_of),
+        new=_keyed_records(new_path, layout, columnNames, key_of),
+        inserts_path=inserts_path,
+        deletes_path=deletes_path,
+        updates_path=updates_path,
+        terminator=layout["terminator"],
+        header_record=header_record if fwf_specs["IncludeHeader"] else None,
+        keyed=bool(key),
+        memory_limit=memory_limit,
+        spill_dir=spill_dir,
+    )
+
+
+def profile_fwf(spec_path, fwf_path, json_path=None, processes=1):
+    """Takes specs, fwf, profiles each column in one streaming pass and returns (and
+    writes as json) its statistics: count, blanks (padding only values), min/max length,
+    min/max value, approximate distinct count (HyperLogLog) and top values (Misra-Gries)
+
+    Args:
+        spec_path (str, dict, bytes, file): path to fwf spec file, see parse_spec_file
+        fwf_path (str, bytes, memoryview, file): path to fwf file, its content
+                                                 or a binary file object
+        json_path (str, optional): path to write the profile to as json. Defaults to None.
+        processes (int, optional): number of processes profiling chunks of records, merged
+                                   in the end, None for all cpus. Defaults to 1.
+
+    Raises:
+        TypeError: if fwf is not a path when profiling with several processes
+
+    Returns:
+        profile[dict]: statistics of each column, by column name
+    """
+    fwf_specs = parse_spec_file(spec=spec_path)
+    record_length = None
+    if processes != 1:
+        if not isinstance(fwf_path, (str, os.PathLike)):
+            raise TypeError("path to fwf should be given to profile in parallel")
+        layout = _fwf_layout(
+            offsets=fwf_specs["Offsets"],
+            padding_char=fwf_specs["PaddingCharacter"],
+            encoding=fwf_specs["FixedWidthEncoding"],
+            column_types=fwf_specs["ColumnTypes"],
+            scales=fwf_specs["ColumnScales"],
+            terminator=fwf_specs["RecordTerminator"],
+            width_unit=fwf_specs["WidthUnit"],
+        )
+        # NOTE line terminated records are cut at line terminators, as they may vary
+        # in length (CRLF, blank lines, multibyte characters)
+        if layout["kind"] == "records":
+            record_length = _fixed_record_length(layout)
+    profile = profile_records(
+        fwf_path=fwf_path,
+        fwf_specs=fwf_specs,
+        record_length=record_length,
+        processes=processes,
+    )
+    if json_path:
+        with open(json_path, "w") as json_file:
+            json_file.write(json.dumps(profile, indent=4))
+    return profile
+
+
+def infer_spec(
+    fwf_path,
+    spec_path=None,
+    sample_bytes=SAMPLE_BYTES,
+    encoding="windows-1252",
+    padding_char=" ",
+    header=None,
+):
+    """Takes an fwf file without specs, samples blocks spread across it and infers
+    its specs: fields start where records go from padding to a value.
+
+    Args:
+        fwf_path (str): path to fwf file
+        spec_path (str, optional): path to write the inferred spec file to. Defaults to None.
+        sample_bytes (int, optional): number of bytes to sample. Defaults to SAMPLE_BYTES.
+        encoding (str, optional): encoding of the fwf file. Defaults to "windows-1252".
+        padding_char (str, optional): padding character used in fwf. Defaults to " ".
+        header (bool, optional): whether the first record is a header, None to use it
+                                 if it splits into distinct names. Defaults to None.
+
+    Raises:
+        ValueError: if the encoding is not supported or no fields are found
+
+    Returns:
+        specs[dict]: inferred specs, in the format of a spec file
+    """
+    if (
+        encoding not in SUPPORTED_ENCODINGS["FixedWidthEncoding"]
+        or encoding in EBCDIC_ENCODINGS
+    ):
+        raise ValueError(f"Can not infer specs of {encoding} encoded files")
+    with open(fwf_path, "rb") as fwf_file:
+        starts, width = _infer_layout(
+            fwf_file, sample_bytes, padding_char.encode(encoding)
+        )
+        fwf_file.seek(0)
+        first = fwf_file.readline().rstrip(b"\r\n")
+    if not starts:
+        raise ValueError("Could not find any fields in the fwf file")
+    ends = starts[1:] + [width]
+    names = [
+        first[start:end].decode(encoding, "ignore").rstrip(padding_char)
+        for start, end in zip(starts, ends)
+    ]
+    if header is None:
+        header = len(set(names)) == len(names) and all(
+            name.replace("-", "_").isidentifier() for name in names
+        )
+    if not header:
+        names = [f"f{nb}" for nb in range(1, len(starts) + 1)]
+    specs = {
+        "ColumnNames": names,
+        "Offsets": [str(end - start) for start, end in zip(starts, ends)],
+        "FixedWidthEncoding": encoding,
+        "IncludeHeader": str(header),
+        "DelimitedEncoding": "utf-8",
+    }
+    if padding_char != " ":
+        specs["PaddingCharacter"] = padding_char
+    if encoding in MULTIBYTE_ENCODINGS:
+        specs["WidthUnit"] = "bytes"
+    if spec_path:
+        with open(spec_path, "w") as spec_file:
+            spec_file.write(json.dumps(specs, indent=4))
+    return specs
+
+
+def generate_fwf_data(spec_path, length=None, seed=None):
     """Takes a specs, number of rows and generates a random fwf data of given number of rows
 
     Args:
         spec_path (str): path to fwf spec file
         length (int, optional): number of rows to generate. Defaults to None.
+        seed (int, optional): seed to generate the same data again. Defaults to None.
 
     Returns:
         rows[genrator]: random fwf data as per specs, of given length
@@ -65,19 +390,41 @@ def generate_fwf_data(spec_path, length=None):
         columnNames=fwf_specs["ColumnNames"],
         offsets=fwf_specs["Offsets"],
         length=length,
+        column_types=fwf_specs["ColumnTypes"],
+        scales=fwf_specs["ColumnScales"],
+        seed=seed,
     )
 
 
-def generate_fwf_file(spec_path, fwf_path, length=None):
+def generate_fwf_file(spec_path, fwf_path, length=None, processes=1):
     """Takes specs, fwf path, length and create a random fwf file in the given path of given length
 
     Args:
         spec_path (str): path to fwf spec file
         fwf_path (str): path to fwf file
         length (int, optional): number of rows of data to generate. Defaults to None.
+        processes (int, optional): number of processes generating and writing rows in place,
+                                   None for all cpus. Defaults to 1.
     """
     fwf_specs = parse_spec_file(spec=spec_path)
-    rows = generate_fwf_data(spec_path=spec_path, length=length,)
+    if processes != 1:
+        generate_fwf_file_parallel(
+            fwf_path=fwf_path,
+            characterSet=fwf_specs["characterSet"],
+            columnNames=fwf_specs["ColumnNames"],
+            offsets=fwf_specs["Offsets"],
+            header=fwf_specs["IncludeHeader"],
+            padding_char=fwf_specs["PaddingCharacter"],
+            encoding=fwf_specs["FixedWidthEncoding"],
+            column_types=fwf_specs["ColumnTypes"],
+            scales=fwf_specs["ColumnScales"],
+            terminator=fwf_specs["RecordTerminator"],
+            width_unit=fwf_specs["WidthUnit"],
+            length=length,
+            processes=processes,
+        )
+        return
+    rows = generate_fwf_data(spec_path=fwf_specs, length=length,)
 
     data_to_fwf(
         data=rows,
@@ -86,12 +433,21 @@ def generate_fwf_file(spec_path, fwf_path, length=None):
         header=fwf_specs["IncludeHeader"],
         padding_char=fwf_specs["PaddingCharacter"],
         encoding=fwf_specs["FixedWidthEncoding"],
+        column_types=fwf_specs["ColumnTypes"],
+        scales=fwf_specs["ColumnScales"],
+        terminator=fwf_specs["RecordTerminator"],
+        width_unit=fwf_specs["WidthUnit"],
     )
     return
 
 
 class DataFrameF:
     """DataFrame to store Data
+
+    Rows are either held in memory (``rows``, header first) or, in lazy mode, read
+    from the source file every time they are needed, so that files larger than memory
+    can be streamed through ``iter_chunks``, ``to_csv`` and ``to_fwf``.
+    Lazy rows are only loaded in memory by ``materialize``.
     """
 
     def __init__(self, spec_path=None):
@@ -100,6 +456,8 @@ class DataFrameF:
         else:
             self.specs = {}
         self.rows = []
+        self.lazy = False
+        self._source = None
 
     def _update_specs(self, spec_path=None):
         if spec_path:
@@ -111,21 +469,79 @@ class DataFrameF:
         else:
             raise SyntaxError("Specs are neither found in Df nor given.")
 
-    def read_fwf(
-        self, fwf_path="", spec_path="",
-    ):
-        self._update_specs(spec_path=spec_path)
-        self.rows = list(read_fwf(spec_path=spec_path, fwf_path=fwf_path,))
+    def _load(self, source, lazy=False):
+        """Keeps source (a callable returning header + rows) to read from lazily
+        or loads the rows from it
+        """
+        self.lazy = lazy
+        if lazy:
+            self._source = source
+            self.rows = []
+        else:
+            self._source = None
+            self.rows = list(source())
         return self
 
-    def random_fwf_data(self, spec_path="", length=None):
+    def _iter_rows(self):
+        """Returns header + rows, read from the source in lazy mode"""
+        if self.lazy:
+            return self._source()
+        return (row for row in self.rows)
+
+    def read_fwf(self, fwf_path="", spec_path="", lazy=False):
+        self._update_specs(spec_path=spec_path)
+        specs = self.specs
+        if lazy and hasattr(fwf_path, "read"):
+            raise ValueError("lazy mode needs a path or bytes to read the fwf again")
+        if lazy:
+            # NOTE fail now rather than on first read, if the file is missing
+            _open_fwf_source(fwf_path).close()
+        return self._load(
+            lambda: read_fwf(spec_path=specs, fwf_path=fwf_path), lazy=lazy
+        )
+
+    def random_fwf_data(self, spec_path="", length=None, lazy=False, seed=None):
         self._update_specs(spec_path=spec_path)
-        self.rows = list(generate_fwf_data(spec_path=spec_path, length=length,))
+        specs = self.specs
+        if lazy:
+            # NOTE lazy random data has to be the same every time it is read
+            if seed is None:
+                seed = random.randrange(sys.maxsize)  # nosec
+            if length is None:
+                length = random.randint(1, 1000)  # nosec
+        return self._load(
+            lambda: generate_fwf_data(spec_path=specs, length=length, seed=seed),
+            lazy=lazy,
+        )
+
+    def materialize(self):
+        """Loads lazy rows in memory"""
+        if self.lazy:
+            self._load(self._source, lazy=False)
         return self
 
+    def iter_chunks(self, rows=10000):
+        """Yields the data (without header) in lists of at most ``rows`` rows
+
+        Args:
+            rows (int, optional): number of rows in a chunk. Defaults to 10000.
+
+        Yields:
+            chunk[list[list[str]]]: rows
+        """
+        if rows <= 0:
+            raise ValueError("rows should be a positive number")
+        data = self._iter_rows()
+        next(data, None)
+        while True:
+            chunk = list(islice(data, rows))
+            if not chunk:
+                return
+            yield chunk
+
     def to_csv(self, csv_path="", sep="\t"):
         data_to_csv(
-            data=self.rows,
+            data=self._iter_rows(),
             csv_path=csv_path,
             header=self.specs.get("IncludeHeader", True),
             sep=sep,
@@ -133,20 +549,32 @@ class DataFrameF:
         )
         return
 
-    def to_fwf(self, spec_path, fwf_path=""):
-        fwf_specs = self._update_specs(spec_path=spec_path)
-        data_to_fwf(
-            data=self.rows,
+    def to_fwf(self, spec_path, fwf_path="", processes=1):
+        self._update_specs(spec_path=spec_path)
+        fwf_specs = self.specs
+        writer = data_to_fwf
+        if processes != 1:
+            writer = partial(data_to_fwf_parallel, processes=processes)
+        writer(
+            # NOTE a list (of loaded rows) lets the parallel writer pre-size the file
+            data=self._iter_rows() if self.lazy else self.rows,
             fwf_path=fwf_path,
             offsets=fwf_specs["Offsets"],
             header=fwf_specs["IncludeHeader"],
             padding_char=fwf_specs["PaddingCharacter"],
             encoding=fwf_specs["FixedWidthEncoding"],
+            column_types=fwf_specs["ColumnTypes"],
+            scales=fwf_specs["ColumnScales"],
+            terminator=fwf_specs["RecordTerminator"],
+            width_unit=fwf_specs["WidthUnit"],
         )
         return
 
+    def _head(self, length):
+        return list(islice(self._iter_rows(), length))
+
     def __str__(self):
-        return f"Specs: {self.specs}\nData: {self.rows[:10]}"  # noqa: E501
+        return f"Specs: {self.specs}\nData: {self._head(10)}"  # noqa: E501
 
     def __repr__(self):
-        return "\n".join(["\t".join(row) for row in self.rows[:5]])
+        return "\n".join(["\t".join(row) for row in self._head(5)])
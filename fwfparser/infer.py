@@ -0,0 +1,145 @@
+import os
+
+# number of blocks, spread across the file, sampled to infer a layout
+SAMPLE_BLOCKS = 16
+# a field starts where this ratio of sampled records go from padding to a value
+BOUNDARY_RATIO = 0.05
+# ...and more than this ratio of the values at that position start there
+START_RATIO = 0.5
+
+
+def _record_length(fwf_file):
+    """Finds the length of fixed length records from the first line of a (binary) file
+
+    Args:
+        fwf_file (file): fwf file opened in binary mode
+
+    Raises:
+        ValueError: if no line terminator is found
+
+    Returns:
+        tuple[int, int]: width of a record without and with its terminator
+    """
+    fwf_file.seek(0)
+    line = fwf_file.readline()
+    if not line.endswith(b"\n"):
+        raise ValueError("Could not find a record terminator in the fwf file")
+    width = len(line.rstrip(b"\r\n"))
+    return width, len(line)
+
+
+def _sample_records(fwf_file, record_length, sample_bytes):
+    """Reads blocks of whole records spread evenly across a (binary) fwf file
+
+    Args:
+        fwf_file (file): fwf file opened in binary mode
+        record_length (int): length of a record including its terminator
+        sample_bytes (int): number of bytes to sample in total
+
+    Returns:
+        blocks[list[bytes]]: sampled blocks of whole records
+    """
+    nb_records = os.fstat(fwf_file.fileno()).st_size // record_length
+    per_block = max(1, sample_bytes // (SAMPLE_BLOCKS * record_length))
+    if nb_records <= per_block * SAMPLE_BLOCKS:
+        starts = [0]
+        per_block = nb_records
+    else:
+        starts = [
+            nb * (nb_records - per_block) // (SAMPLE_BLOCKS - 1)
+            for nb in range(SAMPLE_BLOCKS)
+        ]
+    blocks = []
+    for start in starts:
+        fwf_file.seek(start * record_length)
+        blocks.append(fwf_file.read(per_block * record_length))
+    return blocks
+
+
+def _value_masks(blocks, width, record_length, padding):
+    """Builds, for each position of a record, a bitset of the sampled records
+    that have a value (not padding) at that position
+
+    Args:
+        blocks (list[bytes]): sampled blocks of whole records
+        width (int): width of a record without its terminator
+        record_length (int): length of a record including its terminator
+        padding (bytes): single byte padding character
+
+    Raises:
+        ValueError: if records in the sample are not all the same length
+
+    Returns:
+        tuple[list[int], int]: bitset of each position, number of sampled records
+    """
+    to_bits = bytes(0x30 if byte == padding[0] else 0x31 for byte in range(256))
+    masks = [0] * width
+    nb_records = 0
+    for block in blocks:
+        records = len(block) // record_length
+        block = block[: records * record_length]
+        terminators = block[record_length - 1 :: record_length]  # noqa: E203
+        if terminators.count(b"\n") != records:
+            raise ValueError("Records in the fwf file are not of the same length")
+        for position in range(width):
+            column = block[position::record_length].translate(to_bits)
+            if column:
+                masks[position] = (masks[position] << records) | int(column, 2)
+        nb_records += records
+    return masks, nb_records
+
+
+def _right_aligned(masks, start, end):
+    """Whether no record goes from a value back to padding from start to end, i.e.
+    values from start are right aligned (padding followed by a value) up to end
+    """
+    return not any(
+        masks[position - 1] & ~masks[position] for position in range(start + 1, end + 1)
+    )
+
+
+def _field_starts(masks, nb_records, ratio=BOUNDARY_RATIO):
+    """Detects where fields start: positions where enough of the records go from
+    padding (end of the previous, left aligned, field) to a value, the previous
+    position being padding in most records and most values there (START_RATIO)
+    starting there, so that spaces inside values are not taken for boundaries.
+    Starts within a right aligned run (padding then a value up to the same end)
+    are one field
+
+    Args:
+        masks (list[int]): bitset of records with a value at each position
+        nb_records (int): number of sampled records
+        ratio (float, optional): ratio of records that should go from padding to a value.
+                                 Defaults to BOUNDARY_RATIO.
+
+    Returns:
+        list[int]: start position of each field
+    """
+    everyone = (1 << nb_records) - 1
+    support = max(1, ratio * nb_records)
+    starts = [0]
+    for position in range(1, len(masks)):
+        before, here = masks[position - 1], masks[position]
+        starting = bin(~before & everyone & here).count("1")
+        if (
+            starting >= support
+            and 2 * bin(before).count("1") < nb_records
+            and starting > START_RATIO * bin(here).count("1")
+            and not _right_aligned(masks, starts[-1], position)
+        ):
+            starts.append(position)
+    return starts
+
+
+def _infer_layout(fwf_file, sample_bytes, padding):
+    """Infers the record width and the start of each field of an fwf file from samples
+
+    Returns:
+        tuple[list[int], int]: start position of each field, width of a record
+    """
+    width, record_length = _record_length(fwf_file)
+    if not width:
+        return [], width
+    blocks = _sample_records(fwf_file, record_length, sample_bytes)
+    masks, nb_records = _value_masks(blocks, width, record_length, padding)
+    return _field_starts(masks, nb_records), width
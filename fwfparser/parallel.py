@@ -0,0 +1,295 @@
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from .utils import (  # isort:skip
+    _fixed_record_length,  # isort:skip
+    _fwf_layout,  # isort:skip
+    _lazy_generate_fwf,  # isort:skip
+    _row_to_fwf_bytes,  # isort:skip
+    _rows_to_fwf_bytes,  # isort:skip
+)
+
+# number of rows serialised and written by a worker in one go
+ROWS_PER_TASK = 100000
+
+
+def _pwrite_all(fd, data, position):
+    """os.pwrite until all of data is written at position"""
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, position)
+        view = view[written:]
+        position += written
+    return
+
+
+def _pwrite_fwf_rows(fwf_path, position, rows, layout):
+    """Encodes rows and writes them at their position in an (already created) fwf file
+
+    Args:
+        fwf_path (str): path to fwf file
+        position (int): byte position of the first row in the file
+        rows (list[list[str]]): rows to write
+        layout (dict): layout from _fwf_layout
+
+    Raises:
+        ValueError: if a row does not encode to exactly one record length
+
+    Returns:
+        int: number of bytes written
+    """
+    record_length = _fixed_record_length(layout)
+    data = _rows_to_fwf_bytes(rows, layout)
+    if len(data) != record_length * len(rows):
+        raise ValueError("Rows should have a value for each offset")
+    fd = os.open(fwf_path, os.O_WRONLY)
+    try:
+        _pwrite_all(fd, data, position)
+    finally:
+        os.close(fd)
+    return len(data)
+
+
+def _pwrite_random_fwf_rows(fwf_path, position, length, seed, characterSet, layout):
+    """Generates length random rows from seed and writes them at their position
+    in an (already created) fwf file
+    """
+    rows = _lazy_generate_fwf(
+        characterSet=characterSet,
+        offsets=layout["offsets"],
+        columnNames=[],
+        length=length,
+        column_types=[ctype for ctype, *_ in layout["fields"]],
+        scales=[scale for *_, scale in layout["fields"]],
+        seed=seed,
+    )
+    next(rows)
+    return _pwrite_fwf_rows(fwf_path, position, list(rows), layout)
+
+
+def _check_rows(rows, nb_offsets, first=1):
+    """Checks that every (non-empty) row has a value for each offset
+
+    Args:
+        rows (list[list[str]]): rows to check
+        nb_offsets (int): number of offsets
+        first (int, optional): number of the first row, in the data. Defaults to 1.
+
+    Raises:
+        ValueError: with the number of the first row without a value for each offset
+    """
+    for nb, row in enumerate(rows, first):
+        if row and len(row) != nb_offsets:
+            raise ValueError(
+                f"Row {nb} should have a value for each offset: "
+                f"{len(row)} values for {nb_offsets} offsets"
+            )
+    return
+
+
+def _create_fwf_file(fwf_path, head, header, layout, length=None):
+    """Creates the fwf file with its header and pre-sizes it for length rows
+
+    Returns:
+        int: byte position of the first row
+    """
+    head = _row_to_fwf_bytes(head, layout, header=True) if header else b""
+    with open(fwf_path, "wb") as fwf_file:
+        fwf_file.write(head)
+        if length is not None:
+            fwf_file.truncate(len(head) + length * _fixed_record_length(layout))
+    return len(head)
+
+
+def _map_tasks(tasks, processes):
+    """Runs (function, args) tasks in a pool of processes, with at most two tasks per
+    process in flight so that lazily produced tasks are not all held in memory
+
+    Yields:
+        result: result of each task, in the order of tasks
+    """
+    processes = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        pending = []
+        for function, args in tasks:
+            pending.append(pool.submit(function, *args))
+            if len(pending) >= 2 * processes:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def _run_tasks(tasks, processes):
+    """Runs (function, args) tasks in a pool of processes, see _map_tasks"""
+    for _ in _map_tasks(tasks, processes):
+        pass
+    return
+
+
+def data_to_fwf_parallel(
+    data,
+    fwf_path="",
+    offsets=None,
+    header=True,
+    padding_char="\t",
+    encoding=None,
+    column_types=None,
+    scales=None,
+    terminator="\n",
+    width_unit="characters",
+    processes=None,
+):
+    """Writes data to an fwf file with several processes. Every record has the same
+    length in bytes, so the position of each row is known and workers write disjoint
+    row ranges in place with os.pwrite, the file is (pre-)sized by the main process.
+    Empty rows (blank lines) are not records and are skipped, rows are checked before
+    being written and the file is removed if writing fails
+
+    Args:
+        data (generator/list/chain): header + rows to be written
+        fwf_path (str, optional): path to fwf file. Defaults to "".
+        offsets (list[int], optional): length of each column. Defaults to None.
+        header (bool, optional): boolean to include header or not. Defaults to True.
+        padding_char (str, optional): padding character. Defaults to "\t".
+        encoding (str, optional): encoding of the fwf file. Defaults to None.
+        column_types (list[str], optional): type of each column. Defaults to None.
+        scales (list[int], optional): implied decimal places of columns. Defaults to None.
+        terminator (str, optional): record terminator for EBCDIC/binary layouts.
+                                    Defaults to "\n".
+        width_unit (str, optional): "characters" or "bytes". Defaults to "characters".
+        processes (int, optional): number of worker processes. Defaults to None (all cpus).
+
+    Raises:
+        ValueError: if a path to fwf is not given or offsets are missing
+        ValueError: if records are not the same length in bytes
+        ValueError: if a row does not have a value for each offset
+        TypeError: if the data is not a list or generator/chain
+    """
+    if encoding is None:
+        encoding = sys.getdefaultencoding()
+    if not fwf_path:
+        raise ValueError("path to fwf should be given")
+    if offsets is None:
+        raise ValueError("offsets must be given")
+    if not isinstance(fwf_path, (str, os.PathLike)):
+        raise TypeError("path to fwf should be given to write in parallel")
+    layout = _fwf_layout(
+        offsets, padding_char, encoding, column_types, scales, terminator, width_unit
+    )
+    record_length = _fixed_record_length(layout)
+    if record_length is None:
+        raise ValueError(
+            "Records should have the same length in bytes to write in parallel"
+        )
+    if isinstance(data, list):
+        _check_rows(data[1:], len(offsets))
+        rows = [row for row in data[1:] if row]
+        head, rows, length = data[0], iter(rows), len(rows)
+    elif hasattr(data, "__next__"):
+        head, rows, length = next(data), data, None
+    else:
+        raise TypeError("data must be a list or generator")
+    position = _create_fwf_file(fwf_path, head, header, layout, length)
+
+    def tasks():
+        nb_read = nb_rows = 0
+        while True:
+            chunk = list(islice(rows, ROWS_PER_TASK))
+            if not chunk:
+                break
+            _check_rows(chunk, len(offsets), first=nb_read + 1)
+            nb_read += len(chunk)
+            chunk = [row for row in chunk if row]
+            yield _pwrite_fwf_rows, (
+                fwf_path,
+                position + nb_rows * record_length,
+                chunk,
+                layout,
+            )
+            nb_rows += len(chunk)
+        if length is None:
+            # NOTE rows of a generator are only counted once they are all written
+            with open(fwf_path, "r+b") as fwf_file:
+                fwf_file.truncate(position + nb_rows * record_length)
+
+    try:
+        _run_tasks(tasks(), processes)
+    except Exception:
+        os.remove(fwf_path)
+        raise
+    return
+
+
+def generate_fwf_file_parallel(
+    fwf_path,
+    characterSet,
+    columnNames,
+    offsets,
+    header=True,
+    padding_char=" ",
+    encoding=None,
+    column_types=None,
+    scales=None,
+    terminator="\n",
+    width_unit="characters",
+    length=None,
+    processes=None,
+    seed=None,
+):
+    """Generates a random fwf file of given length with several processes, each worker
+    generates and writes its own row range (seeded from seed) in the pre-sized file
+
+    Args:
+        fwf_path (str): path to fwf file
+        characterSet (str): valid to pick characters from
+        columnNames (list[str]): names of each column
+        offsets (list[int]): length of each column
+        header (bool, optional): boolean to include header or not. Defaults to True.
+        padding_char (str, optional): padding character. Defaults to " ".
+        encoding (str, optional): encoding of the fwf file. Defaults to None.
+        column_types (list[str], optional): type of each column. Defaults to None.
+        scales (list[int], optional): implied decimal places of columns. Defaults to None.
+        terminator (str, optional): record terminator for EBCDIC/binary layouts.
+                                    Defaults to "\n".
+        width_unit (str, optional): "characters" or "bytes". Defaults to "characters".
+        length (int, optional): number of rows of data to generate. Defaults to None.
+        processes (int, optional): number of worker processes. Defaults to None (all cpus).
+        seed (int, optional): seed to generate the same file again. Defaults to None.
+
+    Raises:
+        ValueError: if records are not the same length in bytes
+    """
+    if encoding is None:
+        encoding = sys.getdefaultencoding()
+    layout = _fwf_layout(
+        offsets, padding_char, encoding, column_types, scales, terminator, width_unit
+    )
+    record_length = _fixed_record_length(layout)
+    if record_length is None:
+        raise ValueError(
+            "Records should have the same length in bytes to write in parallel"
+        )
+    if length is None:
+        length = random.randint(1, 1000)  # nosec
+    if seed is None:
+        seed = random.randrange(sys.maxsize)  # nosec
+    position = _create_fwf_file(fwf_path, columnNames, header, layout, length)
+    tasks = (
+        (
+            _pwrite_random_fwf_rows,
+            (
+                fwf_path,
+                position + start * record_length,
+                min(ROWS_PER_TASK, length - start),
+                seed + start,
+                characterSet,
+                layout,
+            ),
+        )
+        for start in range(0, length, ROWS_PER_TASK)
+    )
+    _run_tasks(tasks, processes)
+    return
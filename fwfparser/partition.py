@@ -0,0 +1,206 @@
+import os
+from collections import OrderedDict
+from itertools import islice
+
+# number of partition files kept open at once, least recently used ones are closed
+MAX_OPEN_WRITERS = 64
+# directory name of blank partition values, as in Hive
+HIVE_DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+# characters escaped (as %XX) in partition values, as in Hive
+HIVE_ESCAPED = set('"#%\'*/:=?\\\x7f{[]^')
+
+
+def _hive_escape(value):
+    """Escapes a value to be used in a (Hive style) partition directory name"""
+    if not value:
+        return HIVE_DEFAULT_PARTITION
+    return "".join(
+        f"%{ord(char):02X}" if char in HIVE_ESCAPED or ord(char) < 0x20 else char
+        for char in value
+    )
+
+
+class _PartitionWriters:
+    """Pool of the files partitions are written to, at most MAX_OPEN_WRITERS are open,
+    the least recently used one is closed to open another (and reopened to append).
+    Each partition rolls over to a new part file once max_rows/max_bytes are reached
+
+    Args:
+        directory (str): directory to write partitions to
+        head (bytes): header written at the start of each part file, b"" for none
+        max_rows (int, optional): number of rows per part file. Defaults to None.
+        max_bytes (int, optional): number of bytes per part file (a row is never split,
+                                   so a single larger row gets its own file).
+                                   Defaults to None.
+    """
+
+    def __init__(self, directory, head=b"", max_rows=None, max_bytes=None):
+        self.directory = directory
+        self.head = head
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.files = OrderedDict()
+        # partition -> [part file number, rows in it, bytes in it]
+        self.parts = {}
+
+    def _path(self, partition, part):
+        return os.path.join(self.directory, partition, f"part-{part:05d}.csv")
+
+    def _file(self, partition):
+        """Open file of the current part of partition, least recently used first"""
+        state = self.parts.get(partition)
+        if state is None:
+            state = self.parts[partition] = [0, 0, 0]
+            os.makedirs(os.path.join(self.directory, partition), exist_ok=True)
+        path = self._path(partition, state[0])
+        if path in self.files:
+            self.files.move_to_end(path)
+            return self.files[path], state
+        if len(self.files) >= MAX_OPEN_WRITERS:
+            self.files.popitem(last=False)[1].close()
+        if not state[1]:
+            sink = self.files[path] = open(path, "wb")
+            sink.write(self.head)
+            state[2] = len(self.head)
+        else:
+            sink = self.files[path] = open(path, "ab")
+        return sink, state
+
+    def _roll(self, partition, state):
+        """Closes the current part file of partition, next rows go to a new one"""
+        sink = self.files.pop(self._path(partition, state[0]), None)
+        if sink is not None:
+            sink.close()
+        state[:] = [state[0] + 1, 0, 0]
+        return
+
+    def write(self, partition, lines, encoding):
+        """Writes csv lines (without line terminators) to a partition
+
+        Args:
+            partition (str): (relative) directory of the partition, "" for none
+            lines (list[str]): csv lines to write
+            encoding (str): encoding of the csv files
+        """
+        while lines:
+            sink, state = self._file(partition)
+            take = len(lines)
+            if self.max_rows:
+                take = min(take, self.max_rows - state[1])
+                if not take:
+                    self._roll(partition, state)
+                    continue
+            if self.max_bytes:
+                data, take = self._fit(lines[:take], encoding, state)
+            else:
+                data = ("\n".join(lines[:take]) + "\n").encode(encoding)
+            sink.write(data)
+            state[1] += take
+            state[2] += len(data)
+            lines = lines[take:]
+            if lines:
+                self._roll(partition, state)
+        return
+
+    def _fit(self, lines, encoding, state):
+        """Encodes as many of lines as fit in the current part file (at least one)
+
+        Returns:
+            tuple[bytes, int]: encoded lines, number of lines
+        """
+        room = self.max_bytes - state[2]
+        encoded = []
+        for line in lines:
+            data = (line + "\n").encode(encoding)
+            room -= len(data)
+            if room < 0 and (encoded or state[1]):
+                break
+            encoded.append(data)
+        return b"".join(encoded), len(encoded)
+
+    def close(self):
+        for sink in self.files.values():
+            sink.close()
+        self.files.clear()
+        return
+
+
+def _write_csv_partitions(
+    data,
+    head,
+    directory,
+    header=True,
+    sep="\t",
+    encoding="utf-8",
+    partition_by=None,
+    max_rows=None,
+    max_bytes=None,
+    rows_per_batch=10000,
+):
+    """Writes rows to csv part files in a directory in the same pass: under Hive style
+    column=value directories with partition_by (partition columns are only in the
+    directory names) and/or rolling over to a new part file every max_rows/max_bytes.
+    Empty rows (blank lines) have no values to partition on and are skipped. The
+    directory must be empty (or not exist yet), part files of an earlier run are never
+    mixed with the new ones
+
+    Args:
+        data (iterator): rows to be written (without header)
+        head (list[str]): header
+        directory (str): directory to write part files to
+        header (bool, optional): boolean to include header in each file. Defaults to True.
+        sep (str, optional): delimiter to be used in the csv. Defaults to "\t".
+        encoding (str, optional): encoding of the csv files. Defaults to "utf-8".
+        partition_by (list[str], optional): columns to partition on. Defaults to None.
+        max_rows (int, optional): number of rows per part file. Defaults to None.
+        max_bytes (int, optional): number of bytes per part file. Defaults to None.
+        rows_per_batch (int, optional): rows grouped and encoded together.
+                                        Defaults to 10000.
+
+    Raises:
+        ValueError: if a partition column is not in the header
+        ValueError: if the directory is not empty
+    """
+    partition_by = partition_by or []
+    missing = [name for name in partition_by if name not in head]
+    if missing:
+        raise ValueError(f"Partition columns not found in header: {missing}")
+    if os.path.isdir(directory) and os.listdir(directory):
+        raise ValueError(f"Directory to write part files to is not empty: {directory}")
+    keys = [head.index(name) for name in partition_by]
+    kept = [idx for idx in range(len(head)) if idx not in keys]
+    head = [head[idx] for idx in kept]
+    names = {}
+    writers = _PartitionWriters(
+        directory=directory,
+        head=(sep.join(head) + "\n").encode(encoding) if header else b"",
+        max_rows=max_rows,
+        max_bytes=max_bytes,
+    )
+    try:
+        while True:
+            rows = list(islice(data, rows_per_batch))
+            if not rows:
+                break
+            rows = [row for row in rows if row]
+            if not keys:
+                writers.write("", [sep.join(row) for row in rows], encoding)
+                continue
+            groups = {}
+            for row in rows:
+                key = tuple(row[idx] for idx in keys)
+                line = sep.join([row[idx] for idx in kept])
+                groups.setdefault(key, []).append(line)
+            for key, lines in groups.items():
+                partition = names.get(key)
+                if partition is None:
+                    partition = names[key] = os.path.join(
+                        *(
+                            f"{_hive_escape(name)}={_hive_escape(value)}"
+                            for name, value in zip(partition_by, key)
+                        )
+                    )
+                writers.write(partition, lines, encoding)
+    finally:
+        writers.close()
+    return
@@ -0,0 +1,310 @@
+import hashlib
+import math
+import os
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from .parallel import _map_tasks
+from .utils import BYTES_PER_BLOCK, _lazy_read_fwf  # isort:skip
+
+# HyperLogLog registers are indexed by the first HLL_PRECISION bits of a value's hash
+HLL_PRECISION = 12
+HLL_REGISTERS = 1 << HLL_PRECISION
+# number of counters kept by the heavy hitter (Misra-Gries) sketch of a column
+TOP_CAPACITY = 64
+# number of top values reported per column
+TOP_VALUES = 10
+# number of rows profiled together (column by column)
+ROWS_PER_CHUNK = 10000
+# number of bytes of records profiled by a worker in one go (streamed)
+BYTES_PER_TASK = 64 * 1024 * 1024
+
+
+def _hll_add(registers, values):
+    """Adds (distinct) values to the HyperLogLog registers of a column
+
+    Args:
+        registers (bytearray): HLL_REGISTERS registers
+        values (iterable[str]): values to add
+    """
+    rest = 64 - HLL_PRECISION
+    for value in values:
+        hashed = int.from_bytes(
+            hashlib.blake2b(
+                value.encode("utf-8", "surrogatepass"), digest_size=8
+            ).digest(),
+            "big",
+        )
+        index = hashed >> rest
+        rank = rest - (hashed & ((1 << rest) - 1)).bit_length() + 1
+        if rank > registers[index]:
+            registers[index] = rank
+    return
+
+
+def _hll_estimate(registers):
+    """Approximate number of distinct values added to HyperLogLog registers,
+    small cardinalities are estimated by linear counting of empty registers
+    """
+    alpha = 0.7213 / (1 + 1.079 / HLL_REGISTERS)
+    estimate = alpha * HLL_REGISTERS ** 2 / sum(2.0 ** -rank for rank in registers)
+    zeros = registers.count(0)
+    if estimate <= 2.5 * HLL_REGISTERS and zeros:
+        estimate = HLL_REGISTERS * math.log(HLL_REGISTERS / zeros)
+    return round(estimate)
+
+
+def _merge_top(top, counts):
+    """Merges counts into a Misra-Gries heavy hitter sketch of at most TOP_CAPACITY
+    counters: counters are summed and, if there are more than TOP_CAPACITY, the
+    (TOP_CAPACITY+1)-th largest count is taken off all of them
+    (counts are lower bounds of the true ones)
+
+    Args:
+        top (dict): heavy hitter sketch, value -> count
+        counts (dict): counts of values (or another sketch) to merge in
+
+    Returns:
+        top[dict]: merged sketch
+    """
+    merged = Counter(top)
+    merged.update(counts)
+    if len(merged) <= TOP_CAPACITY:
+        return dict(merged)
+    cut = sorted(merged.values(), reverse=True)[TOP_CAPACITY]
+    return {value: count - cut for value, count in merged.items() if count > cut}
+
+
+def _numeric(value):
+    """Decimal of a (zoned/packed) column value, None if it is not a number"""
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        return None
+
+
+def _new_profile(column_type="text"):
+    """Empty (partial) profile of a column"""
+    return {
+        "type": column_type,
+        "count": 0,
+        "blanks": 0,
+        "min_length": None,
+        "max_length": None,
+        "min": None,
+        "max": None,
+        "registers": bytearray(HLL_REGISTERS),
+        "top": {},
+    }
+
+
+def _bound(current, candidate, pick, key=None):
+    """min/max (pick) of current and candidate, ignoring Nones"""
+    candidates = [value for value in (current, candidate) if value is not None]
+    if not candidates:
+        return None
+    return pick(candidates, key=key)
+
+
+def _update_profile(profile, values):
+    """Updates the (partial) profile of a column with a chunk of its values,
+    blank (padding only) values are counted but not sketched
+
+    Args:
+        profile (dict): profile from _new_profile
+        values (tuple[str]): parsed values of the column
+    """
+    counts = Counter(values)
+    blanks = counts.pop("", 0)
+    profile["count"] += len(values)
+    profile["blanks"] += blanks
+    if not counts:
+        return
+    lengths = list(map(len, counts))
+    profile["min_length"] = _bound(profile["min_length"], min(lengths), min)
+    profile["max_length"] = _bound(profile["max_length"], max(lengths), max)
+    key = _numeric if profile["type"] != "text" else None
+    values = [value for value in counts if key is None or key(value) is not None]
+    if values:
+        profile["min"] = _bound(profile["min"], min(values, key=key), min, key)
+        profile["max"] = _bound(profile["max"], max(values, key=key), max, key)
+    _hll_add(profile["registers"], counts)
+    profile["top"] = _merge_top(profile["top"], counts)
+    return
+
+
+def _merge_profiles(profile, other):
+    """Merges the partial profile other (of another chunk) into profile"""
+    key = _numeric if profile["type"] != "text" else None
+    profile["count"] += other["count"]
+    profile["blanks"] += other["blanks"]
+    for name, pick in [("min_length", min), ("max_length", max)]:
+        profile[name] = _bound(profile[name], other[name], pick)
+    for name, pick in [("min", min), ("max", max)]:
+        profile[name] = _bound(profile[name], other[name], pick, key)
+    profile["registers"] = bytearray(map(max, profile["registers"], other["registers"]))
+    profile["top"] = _merge_top(profile["top"], other["top"])
+    return
+
+
+def _finish_profile(profile, top_values=TOP_VALUES):
+    """Turns the sketches of a profile into (JSON serialisable) statistics"""
+    finished = {
+        name: value
+        for name, value in profile.items()
+        if name not in ("registers", "top")
+    }
+    finished["distinct"] = _hll_estimate(profile["registers"])
+    top = sorted(profile["top"].items(), key=lambda item: (-item[1], item[0]))
+    finished["top_values"] = [list(item) for item in top[:top_values]]
+    return finished
+
+
+def _profile_rows(rows, column_types):
+    """Profiles (data) rows in one pass, ROWS_PER_CHUNK rows at a time
+
+    Args:
+        rows (iterator[list[str]]): parsed rows, without header
+        column_types (list[str]): type of each column
+
+    Returns:
+        profiles[list[dict]]: partial profile of each column
+    """
+    profiles = [_new_profile(column_type) for column_type in column_types]
+    while True:
+        chunk = [row for row in islice(rows, ROWS_PER_CHUNK) if row]
+        if not chunk:
+            break
+        for profile, values in zip(profiles, zip(*chunk)):
+            _update_profile(profile, values)
+    return profiles
+
+
+def _read_rows(fwf_path, fwf_specs):
+    """Parsed data rows (without header) of an fwf file/buffer"""
+    rows = _lazy_read_fwf(
+        fwf_path=fwf_path,
+        encoding=fwf_specs["FixedWidthEncoding"],
+        offsets=fwf_specs["Offsets"],
+        padding_char=fwf_specs["PaddingCharacter"],
+        columnNames=fwf_specs["ColumnNames"],
+        column_types=fwf_specs["ColumnTypes"],
+        scales=fwf_specs["ColumnScales"],
+        terminator=fwf_specs["RecordTerminator"],
+        width_unit=fwf_specs["WidthUnit"],
+    )
+    next(rows)
+    return rows
+
+
+class _RangeFile:
+    """Binary file object reading head then at most size bytes of a file
+    from its position
+    """
+
+    def __init__(self, fwf_file, size, head=b""):
+        self.fwf_file = fwf_file
+        self.left = size
+        self.head = head
+
+    def read(self, size=-1):
+        if self.head:
+            data, self.head = self.head, b""
+            return data
+        if size is None or size < 0 or size > self.left:
+            size = self.left
+        data = self.fwf_file.read(size)
+        self.left -= len(data)
+        return data
+
+
+def _line_start(fwf_file, position):
+    """Position of the first line of a file starting at or after position"""
+    if not position:
+        return 0
+    at = position - 1
+    fwf_file.seek(at)
+    while True:
+        block = fwf_file.read(BYTES_PER_BLOCK)
+        if not block:
+            return at
+        cut_at = block.find(b"\n")
+        if cut_at >= 0:
+            return at + cut_at + 1
+        at += len(block)
+
+
+def _profile_fwf_range(fwf_path, position, size, fwf_specs, record_length=None):
+    """Profiles the records of size bytes of an fwf file from position, streamed.
+    Fixed length records are cut at position and position + size (multiples of
+    record_length), line terminated ones at the first line starting at or after them
+
+    Returns:
+        profiles[list[dict]]: partial profile of each column
+    """
+    with open(fwf_path, "rb") as fwf_file:
+        start, end = position, position + size
+        head = b""
+        if record_length is None:
+            start, end = _line_start(fwf_file, start), _line_start(fwf_file, end)
+            # NOTE only the first line of the file is dropped when it is the header,
+            # other ranges start with a blank line (an empty row, not profiled)
+            head = b"\n" if start else b""
+        fwf_file.seek(start)
+        return _profile_rows(
+            _read_rows(_RangeFile(fwf_file, end - start, head), fwf_specs),
+            _column_types(fwf_specs),
+        )
+
+
+def _column_types(fwf_specs):
+    """Type of each column of (validated) specs, "text" if not given"""
+    return fwf_specs["ColumnTypes"] or ["text"] * len(fwf_specs["Offsets"])
+
+
+def profile_records(fwf_path, fwf_specs, record_length=None, processes=1):
+    """Profiles every column of an fwf file in one streaming pass, or with several
+    processes each profiling its own range of records, partial profiles are merged
+
+    Args:
+        fwf_path (str, bytes, memoryview, file): fwf file, a path when processes != 1
+        fwf_specs (dict): validated specs
+        record_length (int, optional): length in bytes of fixed length records (which
+                                       are cut at whole records), None to cut at line
+                                       terminators with processes != 1.
+                                       Defaults to None.
+        processes (int, optional): number of processes, None for all cpus. Defaults to 1.
+
+    Returns:
+        profiles[dict]: statistics of each column, by column name
+    """
+    if processes == 1:
+        profiles = _profile_rows(
+            _read_rows(fwf_path, fwf_specs), _column_types(fwf_specs)
+        )
+    else:
+        size = os.path.getsize(fwf_path)
+        task_size = BYTES_PER_TASK
+        if record_length:
+            task_size = max(1, task_size // record_length) * record_length
+        tasks = (
+            (
+                _profile_fwf_range,
+                (fwf_path, position, task_size, fwf_specs, record_length),
+            )
+            for position in range(0, size, task_size)
+        )
+        profiles = None
+        for partials in _map_tasks(tasks, processes):
+            if profiles is None:
+                profiles = partials
+                continue
+            for profile, partial in zip(profiles, partials):
+                _merge_profiles(profile, partial)
+        if profiles is None:
+            profiles = [_new_profile(ctype) for ctype in _column_types(fwf_specs)]
+    return {
+        name: _finish_profile(profile)
+        for name, profile in zip(fwf_specs["ColumnNames"], profiles)
+    }
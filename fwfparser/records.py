@@ -0,0 +1,184 @@
+import hashlib
+import os
+import struct
+
+from .utils import (  # isort:skip
+    BYTES_PER_BLOCK,  # isort:skip
+    MULTIBYTE_ENCODINGS,  # isort:skip
+    RECORDS_PER_BLOCK,  # isort:skip
+    _column_fields,  # isort:skip
+    _open_fwf_source,  # isort:skip
+    _row_to_fwf_bytes,  # isort:skip
+)
+
+# size in bytes of record/key fingerprints
+DIGEST_SIZE = 16
+# number of partition files records are spilled into, per level
+PARTITIONS = 64
+# (approximate) memory taken by a fingerprint kept in a dict/set
+BYTES_PER_KEY = 200
+# frame of spilled records: key fingerprint + record length
+_FRAME = struct.Struct(f">{DIGEST_SIZE}sI")
+
+
+def _fingerprint(data):
+    """Fingerprint (blake2b digest) of raw record/key bytes"""
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+
+def _reopen_fwf_source(source):
+    """Opens a source for one more pass over it, file objects are rewound
+
+    Raises:
+        ValueError: if source is a file object that can not be rewound
+    """
+    if hasattr(source, "read"):
+        if not (hasattr(source, "seekable") and source.seekable()):
+            raise ValueError("fwf file objects should be seekable to be read again")
+        source.seek(0)
+    return _open_fwf_source(source)
+
+
+def _lazy_read_raw_records(fwf_file, layout):
+    """Reads an opened (binary) fwf file as raw records, without parsing them
+
+    Args:
+        fwf_file (file): fwf file opened in binary mode
+        layout (dict): layout from _fwf_layout
+
+    Raises:
+        ValueError: if a file of fixed length records does not contain whole records
+
+    Yields:
+        record[bytes]: raw record, without terminator, empty lines are skipped
+    """
+    with fwf_file:
+        if layout["kind"] == "records":
+            width = sum(layout["offsets"])
+            record_length = width + len(layout["terminator"])
+            while record_length:
+                block = fwf_file.read(record_length * RECORDS_PER_BLOCK)
+                if not block:
+                    break
+                if len(block) % record_length not in (0, width):
+                    raise ValueError("Lines should be of same length as sum of offsets")
+                for record_at in range(0, len(block), record_length):
+                    yield block[record_at : record_at + width]  # noqa: E203
+            return
+        remainder = b""
+        while True:
+            block = fwf_file.read(BYTES_PER_BLOCK)
+            if not block:
+                break
+            block = remainder + block
+            cut_at = block.rfind(b"\n") + 1
+            block, remainder = block[:cut_at], block[cut_at:]
+            for line in block.split(b"\n")[:-1]:
+                line = line[:-1] if line.endswith(b"\r") else line
+                if line:
+                    yield line
+        remainder = remainder[:-1] if remainder.endswith(b"\r") else remainder
+        if remainder:
+            yield remainder
+
+
+def _header_record(layout, columnNames):
+    """Raw header record (without terminator) of a layout"""
+    header = _row_to_fwf_bytes(columnNames, layout, header=True)
+    return header[: len(header) - len(layout["terminator"])]
+
+
+def _skip_header(records, header_record):
+    """Drops the first record if it is the header"""
+    first = next(records, None)
+    if first is not None and first != header_record:
+        yield first
+    yield from records
+
+
+def _record_key(layout, columnNames, key=None):
+    """Returns a function fingerprinting the key columns of a raw record,
+    or the whole record when no key columns are given
+
+    Args:
+        layout (dict): layout from _fwf_layout
+        columnNames (list[str]): names of each column in fwf
+        key (list[str], optional): names of the key columns. Defaults to None.
+
+    Raises:
+        ValueError: if a key column is not one of columnNames
+
+    Returns:
+        function: raw record -> fingerprint of its key
+    """
+    if not key:
+        return _fingerprint
+    missing = [name for name in key if name not in columnNames]
+    if missing:
+        raise ValueError(f"Key columns not found in ColumnNames: {missing}")
+    fields = _column_fields(layout["offsets"])
+    slices = [fields[columnNames.index(name)][1:3] for name in key]
+    if layout["kind"] == "text" and layout["encoding"] in MULTIBYTE_ENCODINGS:
+        # NOTE offsets are in characters, records have to be decoded to be sliced
+        encoding = layout["encoding"]
+        return lambda record: _fingerprint(
+            "".join(
+                record.decode(encoding)[start:end] for start, end in slices
+            ).encode(encoding)
+        )
+    if len(slices) == 1:
+        start, end = slices[0]
+        return lambda record: _fingerprint(record[start:end])
+    return lambda record: _fingerprint(
+        b"".join(record[start:end] for start, end in slices)
+    )
+
+
+def _keyed_records(source, layout, columnNames, key_of):
+    """Returns a callable that reads source again (skipping its header)
+    as (key fingerprint, raw record) pairs on every call
+    """
+
+    def pairs():
+        records = _lazy_read_raw_records(_reopen_fwf_source(source), layout)
+        for record in _skip_header(records, _header_record(layout, columnNames)):
+            yield key_of(record), record
+
+    return pairs
+
+
+def _spill_partitions(pairs, directory, name, depth):
+    """Spills (key fingerprint, raw record) pairs to PARTITIONS files on disk,
+    partitioned by the depth-th byte of the key fingerprint
+
+    Args:
+        pairs (iterator): (key fingerprint, raw record) pairs
+        directory (str): directory to create the partition files in
+        name (str): prefix of the partition file names
+        depth (int): byte of the fingerprint to partition on
+
+    Returns:
+        paths[list[str]]: path of each partition file
+    """
+    paths = [
+        os.path.join(directory, f"{name}.{depth}.{nb}") for nb in range(PARTITIONS)
+    ]
+    files = [open(path, "wb") for path in paths]
+    try:
+        for key, record in pairs:
+            files[key[depth] % PARTITIONS].write(_FRAME.pack(key, len(record)) + record)
+    finally:
+        for partition in files:
+            partition.close()
+    return paths
+
+
+def _read_partition(path):
+    """Reads back (key fingerprint, raw record) pairs spilled to a partition file"""
+    with open(path, "rb", buffering=BYTES_PER_BLOCK) as partition:
+        while True:
+            frame = partition.read(_FRAME.size)
+            if not frame:
+                return
+            key, length = _FRAME.unpack(frame)
+            yield key, partition.read(length)
@@ -1,9 +1,18 @@
+import csv
+import io
 import json
+import os
 import random
+import sqlite3
 import sys
 import types
 import warnings
-from itertools import chain
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import chain, islice
+from operator import itemgetter
+
+from .partition import _write_csv_partitions  # isort:skip
 
 MIN_SPECS = [
     "ColumnNames",
@@ -13,10 +22,58 @@ MIN_SPECS = [
     "DelimitedEncoding",
 ]
 SUPPORTED_ENCODINGS = {
-    "FixedWidthEncoding": ["windows-1252", "cp1252"],
+    "FixedWidthEncoding": [
+        "windows-1252",
+        "cp1252",
+        "cp037",
+        "cp500",
+        "utf-8",
+        "shift_jis",
+        "euc-jp",
+        "gbk",
+        "big5",
+    ],
     "DelimitedEncoding": ["utf-8"],
 }
+EBCDIC_ENCODINGS = ["cp037", "cp500"]
+# ascii compatible encodings where a character can take more than one byte
+MULTIBYTE_ENCODINGS = ["utf-8", "shift_jis", "euc-jp", "gbk", "big5"]
+SUPPORTED_COLUMN_TYPES = ["text", "zoned", "packed"]
+SUPPORTED_WIDTH_UNITS = ["characters", "bytes"]
 SPEC_HEADER = ["True", "False"]
+# number of fixed length records decoded together in the binary (record) reader
+RECORDS_PER_BLOCK = 4096
+# number of bytes read together in the byte width (multibyte) reader
+BYTES_PER_BLOCK = 1 << 20
+# number of rows encoded and written together by the fwf/csv writers
+ROWS_PER_BATCH = 10000
+# number of rows committed together by the sqlite loader
+ROWS_PER_TRANSACTION = 500000
+# pragmas set while bulk loading into sqlite, and restored after
+SQLITE_LOAD_PRAGMAS = {
+    "synchronous": "OFF",
+    "journal_mode": "MEMORY",
+    "temp_store": "MEMORY",
+    "cache_size": -262144,
+}
+SQLITE_IF_EXISTS = ["append", "replace", "fail"]
+# significant digits sqlite INTEGER (64 bit) and REAL (double) columns hold exactly,
+# wider decimals are stored as TEXT
+SQLITE_INTEGER_DIGITS = 18
+SQLITE_REAL_DIGITS = 15
+# sign nibbles used by packed (COMP-3) decimals, c/a/e/f are positive, d/b negative
+PACKED_SIGNS = {
+    "a": "",
+    "c": "",
+    "e": "",
+    "f": "",
+    "b": "-",
+    "d": "-",
+}
+# digit zone and sign zones of EBCDIC zoned decimals ("f" zones, signed as packed)
+# and of ascii ones ("3" zones, "3"/"7" signs)
+EBCDIC_ZONED = ("f", PACKED_SIGNS)
+ASCII_ZONED = ("3", {"3": "", "7": "-"})
 
 
 def valid_cp1252_charInts():
@@ -46,34 +103,44 @@ OPTIONAL_SPECS = {
     "Alignment": "left",
     "PaddingCharacter": " ",
     "characterSet": valid_cp1252_charInts(),
+    "ColumnTypes": None,
+    "ColumnScales": None,
+    "RecordTerminator": "\n",
+    "WidthUnit": "characters",
 }
 
 
 def parse_spec_file(spec):
-    """Takes spec (as a dict or a path to spec file)
+    """Takes spec (as a dict, a path to spec file, the spec file's content or
+    an opened spec file)
 
     Args:
-        spec (dict, str): dict of specs or path to fwf spec file
+        spec (dict, str, bytes, file): dict of specs, path to fwf spec file,
+                                       json bytes (bytes/memoryview) or file object
 
     Raises:
         ValueError: Invalid format: Spec file, if the spec file does not meet minimum requirements
-        ValueError: spec should be dict or str
+        ValueError: spec should be dict, str, bytes or a file object
 
     Returns:
         specs[dict]: valid specs + additional optional specs
     """
     if isinstance(spec, dict):
-        # TODO: Does accept dict but this functionality is not bubbled up
         return validate_specs(spec)
-    elif isinstance(spec, str):
-        with open(str(spec), "r") as spec_file:
-            try:
-                specs = json.loads(spec_file.read())
-            except ValueError:
-                raise ValueError("Invalid format: Spec file")
-        return validate_specs(specs)
+    if isinstance(spec, (str, os.PathLike)):
+        with open(spec, "r") as spec_file:
+            spec = spec_file.read()
+    elif isinstance(spec, (bytes, bytearray, memoryview)):
+        spec = bytes(spec)
+    elif hasattr(spec, "read"):
+        spec = spec.read()
     else:
-        raise ValueError("spec should be dict or str")
+        raise ValueError("spec should be dict, str, bytes or a file object")
+    try:
+        specs = json.loads(spec)
+    except ValueError:
+        raise ValueError("Invalid format: Spec file")
+    return validate_specs(specs)
 
 
 def validate_specs(specs=None):
@@ -90,8 +157,15 @@ def validate_specs(specs=None):
     """
     if specs is None:
         raise ValueError("Invalid Spec file")
-    if set(MIN_SPECS) != set(specs.keys()):
+    # NOTE validated specs can be validated again, but are never changed in place
+    specs = dict(specs)
+    if not set(MIN_SPECS).issubset(specs.keys()):
         raise ValueError("Minimum Specs not met")
+    if not set(specs.keys()).issubset(set(MIN_SPECS) | set(OPTIONAL_SPECS)):
+        raise ValueError(
+            "Unknown specs: "
+            f"{sorted(set(specs.keys()) - set(MIN_SPECS) - set(OPTIONAL_SPECS))}"
+        )
     if len(specs["ColumnNames"]) != len(specs["Offsets"]):
         raise ValueError("Number of ColumnNames should be equal to number of offsets")
     if len(specs["ColumnNames"]) <= 0:
@@ -104,7 +178,9 @@ def validate_specs(specs=None):
         raise ValueError(
             f"Only supports encodings: {SUPPORTED_ENCODINGS['DelimitedEncoding']}"
         )
-    if specs["IncludeHeader"] not in SPEC_HEADER:
+    if isinstance(specs["IncludeHeader"], bool):
+        pass
+    elif specs["IncludeHeader"] not in SPEC_HEADER:
         raise ValueError(f"IncludeHeader can only be: {SPEC_HEADER}")
     elif specs["IncludeHeader"].lower() == "true":
         specs["IncludeHeader"] = True
@@ -122,8 +198,356 @@ def validate_specs(specs=None):
             )
         if specs["Offsets"][nb] < 0:
             raise ValueError("Offsets can not be negative")
-    OPTIONAL_SPECS.update(specs)
-    return OPTIONAL_SPECS
+    if "characterSet" not in specs:
+        specs["characterSet"] = _encodable_characters(
+            OPTIONAL_SPECS["characterSet"], specs["FixedWidthEncoding"]
+        )
+    specs = {**OPTIONAL_SPECS, **specs}
+    return _validate_column_types(specs)
+
+
+def _validate_column_types(specs):
+    """Fills in and verifies the optional per column binary field specs
+    ("ColumnTypes", "ColumnScales") and the "RecordTerminator"
+
+    Args:
+        specs (dict): specs dict with minimum and optional specs
+
+    Raises:
+        ValueError: if the column types or scales do not match the columns
+
+    Returns:
+        specs[dict]: specs with "ColumnTypes" and "ColumnScales" filled in
+    """
+    nb_columns = len(specs["ColumnNames"])
+    if specs["ColumnTypes"] is None:
+        specs["ColumnTypes"] = ["text"] * nb_columns
+    if specs["ColumnScales"] is None:
+        specs["ColumnScales"] = [0] * nb_columns
+    if len(specs["ColumnTypes"]) != nb_columns:
+        raise ValueError("Number of ColumnTypes should be equal to number of offsets")
+    if len(specs["ColumnScales"]) != nb_columns:
+        raise ValueError("Number of ColumnScales should be equal to number of offsets")
+    specs["ColumnTypes"] = [str(ctype).lower() for ctype in specs["ColumnTypes"]]
+    for ctype in specs["ColumnTypes"]:
+        if ctype not in SUPPORTED_COLUMN_TYPES:
+            raise ValueError(f"ColumnTypes can only be: {SUPPORTED_COLUMN_TYPES}")
+    try:
+        specs["ColumnScales"] = list(map(int, specs["ColumnScales"]))
+    except ValueError:
+        raise ValueError("Not able to convert column scales to ints")
+    for ctype, offset, scale in zip(
+        specs["ColumnTypes"], specs["Offsets"], specs["ColumnScales"]
+    ):
+        if scale < 0:
+            raise ValueError("ColumnScales can not be negative")
+        if ctype != "text" and scale >= _decimal_digits(ctype, offset):
+            raise ValueError(
+                "ColumnScales should be smaller than the digits in a column"
+            )
+    if not isinstance(specs["RecordTerminator"], str):
+        raise ValueError("RecordTerminator should be a string")
+    if specs["WidthUnit"] not in SUPPORTED_WIDTH_UNITS:
+        raise ValueError(f"WidthUnit can only be: {SUPPORTED_WIDTH_UNITS}")
+    if specs["FixedWidthEncoding"] in MULTIBYTE_ENCODINGS and any(
+        ctype != "text" for ctype in specs["ColumnTypes"]
+    ):
+        raise ValueError("zoned/packed columns need a single byte FixedWidthEncoding")
+    if _is_byte_width_layout(specs["FixedWidthEncoding"], specs["WidthUnit"]):
+        if len(specs["PaddingCharacter"].encode(specs["FixedWidthEncoding"])) != 1:
+            raise ValueError(
+                "PaddingCharacter should be a single byte with WidthUnit bytes"
+            )
+    return specs
+
+
+def _encodable_characters(characters, encoding):
+    """Filters a character set down to the characters that can be written in given encoding
+
+    Args:
+        characters (str): characters to pick from
+        encoding (str): encoding of the fwf file
+
+    Returns:
+        str: characters that round trip through the encoding
+    """
+    valid = ""
+    for char in characters:
+        try:
+            char.encode(encoding)
+        except UnicodeEncodeError:
+            continue
+        valid += char
+    return valid
+
+
+def _decimal_digits(column_type, offset):
+    """Number of decimal digits that fit in a packed/zoned column of given width (in bytes)"""
+    if column_type == "packed":
+        return max(2 * offset - 1, 0)
+    return offset
+
+
+def _is_byte_width_layout(encoding, width_unit):
+    """Whether offsets are in bytes for an encoding where bytes and characters differ"""
+    return width_unit == "bytes" and encoding in MULTIBYTE_ENCODINGS
+
+
+def _is_binary_layout(encoding, column_types):
+    """Whether records have to be read as bytes (EBCDIC or binary columns)
+    instead of as lines of text
+    """
+    return encoding in EBCDIC_ENCODINGS or any(
+        ctype != "text" for ctype in column_types or []
+    )
+
+
+@lru_cache(maxsize=None)
+def _latin1_translate_table(encoding):
+    """Builds a translate table mapping every byte of a single byte encoding onto
+    the latin-1 byte of the same character, so that a whole block of records can be
+    decoded with bytes.translate() + latin-1 instead of a per character charmap
+
+    Args:
+        encoding (str): single byte encoding of the fwf file (ex: cp037, cp500)
+
+    Returns:
+        table[bytes/None]: 256 byte translate table or None if the encoding
+                           has characters outside of latin-1
+    """
+    try:
+        return bytes(range(256)).decode(encoding).encode("latin-1")
+    except (UnicodeDecodeError, UnicodeEncodeError):
+        return None
+
+
+def _decode_block(block, encoding):
+    """Decodes a block of single byte encoded records to a str with one character per byte"""
+    table = _latin1_translate_table(encoding)
+    if table is None:
+        return block.decode(encoding)
+    return block.translate(table).decode("latin-1")
+
+
+def _format_decimal(digits, sign, scale):
+    """Formats the digits of a packed/zoned decimal as a number string
+
+    Args:
+        digits (str): decimal digits
+        sign (str): "-" or ""
+        scale (int): number of implied decimal places
+
+    Raises:
+        ValueError: if the digits are not valid decimal digits
+
+    Returns:
+        str: number, ex: "-123.45"
+    """
+    if not digits.isdigit():
+        raise ValueError(f"Invalid decimal digits: {digits}")
+    digits = digits.lstrip("0")
+    if not digits:
+        sign = ""
+    if scale:
+        digits = digits.rjust(scale + 1, "0")
+        digits = digits[:-scale] + "." + digits[-scale:]
+    return sign + (digits or "0")
+
+
+def _decode_packed(hexed, scale=0, encoding=None):
+    """Decodes a packed decimal (COMP-3) field from its hex representation
+
+    Args:
+        hexed (str): hex of the field bytes, two nibbles per byte ex: "12345c"
+        scale (int, optional): number of implied decimal places. Defaults to 0.
+        encoding (str, optional): encoding of the fwf file, unused. Defaults to None.
+
+    Raises:
+        ValueError: if the sign nibble is not valid
+
+    Returns:
+        str: number, ex: "12345"
+    """
+    if not hexed:
+        return ""
+    try:
+        sign = PACKED_SIGNS[hexed[-1]]
+    except KeyError:
+        raise ValueError(f"Invalid packed decimal sign: {hexed}")
+    return _format_decimal(hexed[:-1], sign, scale)
+
+
+def _decode_zoned(hexed, scale=0, encoding=None):
+    """Decodes a zoned decimal field from its hex representation,
+    digits are the low nibbles and the sign is the zone of the last byte,
+    with EBCDIC ("f") or ascii ("3") zones depending on the encoding
+
+    Args:
+        hexed (str): hex of the field bytes ex: "f1f2c3"
+        scale (int, optional): number of implied decimal places. Defaults to 0.
+        encoding (str, optional): encoding of the fwf file. Defaults to None (ascii).
+
+    Raises:
+        ValueError: if a zone or the sign nibble is not valid for the encoding
+
+    Returns:
+        str: number, ex: "123"
+    """
+    if not hexed:
+        return ""
+    zone, signs = EBCDIC_ZONED if encoding in EBCDIC_ENCODINGS else ASCII_ZONED
+    if hexed[:-2:2].strip(zone):
+        raise ValueError(f"Invalid zoned decimal zones: {hexed}")
+    try:
+        sign = signs[hexed[-2]]
+    except KeyError:
+        raise ValueError(f"Invalid zoned decimal sign: {hexed}")
+    return _format_decimal(hexed[1::2], sign, scale)
+
+
+DECIMAL_DECODERS = {"packed": _decode_packed, "zoned": _decode_zoned}
+
+
+def _split_decimal(value, scale):
+    """Splits a number string into its sign and digits, scaled by implied decimal places"""
+    value = str(value).strip()
+    sign = ""
+    if value[:1] in ("-", "+"):
+        sign, value = value[0].replace("+", ""), value[1:]
+    integer, _, fraction = value.partition(".")
+    digits = (integer + fraction[:scale].ljust(scale, "0")).lstrip("0") or "0"
+    if not digits.isdigit():
+        raise ValueError(f"Invalid decimal value: {value}")
+    return sign, digits
+
+
+def _encode_packed(value, offset, scale=0, encoding=None):
+    """Encodes a number string as a packed decimal (COMP-3) field of offset bytes"""
+    if not offset:
+        return b""
+    sign, digits = _split_decimal(value, scale)
+    nb_digits = _decimal_digits("packed", offset)
+    if len(digits) > nb_digits:
+        raise ValueError(f"{value} does not fit in a packed decimal of {offset} bytes")
+    return bytes.fromhex(digits.rjust(nb_digits, "0") + ("d" if sign else "c"))
+
+
+def _encode_zoned(value, offset, scale=0, encoding=None):
+    """Encodes a number string as a zoned decimal field of offset bytes,
+    with EBCDIC ("f") or ascii ("3") zones depending on the encoding
+    """
+    if not offset:
+        return b""
+    sign, digits = _split_decimal(value, scale)
+    if len(digits) > offset:
+        raise ValueError(f"{value} does not fit in a zoned decimal of {offset} bytes")
+    if encoding in EBCDIC_ENCODINGS:
+        zone, positive, negative = "f", "c", "d"
+    else:
+        zone, positive, negative = "3", "3", "7"
+    digits = digits.rjust(offset, "0")
+    hexed = "".join(zone + digit for digit in digits[:-1])
+    return bytes.fromhex(hexed + (negative if sign else positive) + digits[-1])
+
+
+DECIMAL_ENCODERS = {"packed": _encode_packed, "zoned": _encode_zoned}
+
+
+class _BufferReader(io.RawIOBase):
+    """Read only raw stream over an in-memory buffer (bytes, bytearray, memoryview),
+    the buffer is not copied, only the parts that are read are
+    """
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast("B")
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        start = {
+            io.SEEK_SET: 0,
+            io.SEEK_CUR: self._position,
+            io.SEEK_END: len(self._view),
+        }
+        self._position = max(0, start[whence] + offset)
+        return self._position
+
+    def readinto(self, buffer):
+        chunk = self._view[self._position : self._position + len(buffer)]  # noqa: E203
+        buffer[: len(chunk)] = chunk
+        self._position += len(chunk)
+        return len(chunk)
+
+
+class _FileReader(io.RawIOBase):
+    """Raw stream reading from a caller's binary file object,
+    which is left open when the stream is closed
+    """
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk = self._fileobj.read(len(buffer))
+        buffer[: len(chunk)] = chunk
+        return len(chunk)
+
+
+def _open_fwf_source(source):
+    """Opens a path, an in-memory buffer or a binary file object for (binary) reading
+
+    Args:
+        source (str, bytes, bytearray, memoryview, file): fwf to read
+
+    Raises:
+        TypeError: if source is none of the above
+
+    Returns:
+        file: binary file object, closing it never closes a caller's file object
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, "rb")
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BufferedReader(_BufferReader(source))
+    if hasattr(source, "read"):
+        return io.BufferedReader(_FileReader(source))
+    raise TypeError("fwf should be a path, bytes, memoryview or a binary file object")
+
+
+@contextmanager
+def _open_sink(target):
+    """Opens a path for (binary) writing or passes a writable binary file object through,
+    which is flushed but left open
+
+    Args:
+        target (str, file): path or binary file object to write to
+
+    Raises:
+        TypeError: if target is neither a path nor writable
+
+    Yields:
+        file: binary file object
+    """
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, "wb") as sink:
+            yield sink
+    elif hasattr(target, "write"):
+        yield target
+        if hasattr(target, "flush"):
+            target.flush()
+    else:
+        raise TypeError("output should be a path or a writable binary file object")
 
 
 def _parse_fwf_line(line=None, offsets=None, padding_char=" "):
@@ -185,7 +609,231 @@ def _dedup_header(header_row, rows):
         return chain([dup], rows)
 
 
-def _lazy_read_fwf(fwf_path, encoding, offsets, padding_char, columnNames):
+def _column_fields(offsets, column_types=None, scales=None):
+    """Precomputes where each column starts and ends in a record
+
+    Args:
+        offsets (list[int]): lengths of each column in fwf
+        column_types (list[str], optional): type of each column. Defaults to text.
+        scales (list[int], optional): implied decimal places of each column. Defaults to 0.
+
+    Returns:
+        fields[list[tuple]]: (column_type, start, end, scale) of each column
+    """
+    column_types = column_types or ["text"] * len(offsets)
+    scales = scales or [0] * len(offsets)
+    fields = []
+    idx_at = 0
+    for col_offset, ctype, scale in zip(offsets, column_types, scales):
+        fields.append((ctype, idx_at, idx_at + int(col_offset), scale))
+        idx_at += int(col_offset)
+    return fields
+
+
+def _parse_fwf_block(block, record_length, fields, encoding, padding_char):
+    """Parses a block of fixed length (byte) records, text columns are decoded in one go
+    for the whole block and packed/zoned columns are decoded from the block's hex
+
+    Args:
+        block (bytes): whole records, each record_length bytes long
+        record_length (int): length of a record including its terminator
+        fields (list[tuple]): (column_type, start, end, scale) of each column
+        encoding (str): single byte encoding of fwf file
+        padding_char (str): padding character uses in fwf to fill gaps
+
+    Returns:
+        rows[list[list[str]]]: parsed rows of the block
+    """
+    text = _decode_block(block, encoding)
+    hexed = block.hex() if any(ctype != "text" for ctype, *_ in fields) else ""
+    rows = []
+    for record_at in range(0, len(block), record_length):
+        row = []
+        for ctype, start, end, scale in fields:
+            start, end = record_at + start, record_at + end
+            if ctype == "text":
+                row.append(text[start:end].rstrip(padding_char))
+            else:
+                row.append(
+                    DECIMAL_DECODERS[ctype](
+                        hexed[2 * start : 2 * end], scale, encoding  # noqa: E203
+                    )
+                )
+        rows.append(row)
+    return rows
+
+
+def _lazy_read_fwf_records(
+    fwf_file,
+    encoding,
+    offsets,
+    padding_char,
+    columnNames,
+    column_types,
+    scales,
+    terminator,
+):
+    """Reads an opened (binary) fwf file as fixed length records, RECORDS_PER_BLOCK at a time
+
+    Args:
+        fwf_file (file): fwf file opened in binary mode
+        encoding (str): single byte encoding of fwf file
+        offsets (list[int]): lengths of each column in fwf (in bytes)
+        padding_char (str): padding character uses in fwf to fill gaps
+        columnNames (list[str]): names of each column in fwf
+        column_types (list[str]): type of each column (text, zoned, packed)
+        scales (list[int]): implied decimal places of each column
+        terminator (str): record terminator, "" for files without one
+
+    Raises:
+        ValueError: if the file does not contain whole records
+
+    Yields:
+        row[list[str]]: parsed rows without the header
+    """
+    fields = _column_fields(offsets, column_types, scales)
+    header_fields = _column_fields(offsets)
+    terminator = terminator.encode(encoding)
+    width = sum(offsets)
+    record_length = width + len(terminator)
+    first = True
+    with fwf_file:
+        while record_length:
+            block = fwf_file.read(record_length * RECORDS_PER_BLOCK)
+            if not block:
+                break
+            if len(block) % record_length:
+                if len(block) % record_length != width:
+                    raise ValueError("Lines should be of same length as sum of offsets")
+                # NOTE last record without a terminator
+                block += terminator
+            if first:
+                first = False
+                header = _parse_fwf_block(
+                    block[:record_length],
+                    record_length,
+                    header_fields,
+                    encoding,
+                    padding_char,
+                )
+                if header[0] == columnNames:
+                    block = block[record_length:]
+            yield from _parse_fwf_block(
+                block, record_length, fields, encoding, padding_char
+            )
+
+
+def _parse_fwf_byte_line(line, offsets, padding_char, encoding):
+    """Takes a (multibyte) encoded fwf line with offsets in bytes, slices and decodes
+    each column on its own
+
+    Args:
+        line (bytes): fwf line to be parsed, without line terminator
+        offsets (list[int]): length of each field in the fwf line (in bytes)
+        padding_char (str): padding character used in fwf
+        encoding (str): encoding of the fwf line
+
+    Raises:
+        ValueError: if lines are not the same length as offsets
+        UnicodeDecodeError: if a column cuts a character in half
+
+    Returns:
+        row[list[str]]: list of strings with each of them being the value in column
+    """
+    if not line:
+        return []
+    if len(line) != sum(offsets):
+        raise ValueError("Lines should be of same length as sum of offsets")
+    row = []
+    idx_at = 0
+    for col_offset in offsets:
+        row.append(
+            line[idx_at : col_offset + idx_at]  # noqa: E203
+            .decode(encoding)
+            .rstrip(padding_char)
+        )
+        idx_at += col_offset
+    return row
+
+
+def _parse_fwf_byte_block(block, offsets, padding_char, encoding):
+    """Parses a block of whole (multibyte) encoded fwf lines with offsets in bytes.
+    Pure ascii blocks are decoded at once and sliced as str, since a byte is a character;
+    only blocks containing multibyte characters are sliced and decoded column by column
+
+    Args:
+        block (bytes): whole lines, including their "\n" terminators
+        offsets (list[int]): length of each field in the fwf line (in bytes)
+        padding_char (str): padding character used in fwf
+        encoding (str): encoding of the fwf file
+
+    Returns:
+        rows[list[list[str]]]: parsed rows of the block
+    """
+    if block.isascii():
+        return [
+            _parse_fwf_line(line=line, offsets=offsets, padding_char=padding_char)
+            for line in _split_lines(block.decode("ascii"), "\n", "\r")
+        ]
+    return [
+        _parse_fwf_byte_line(line, offsets, padding_char, encoding)
+        for line in _split_lines(block, b"\n", b"\r")
+    ]
+
+
+def _split_lines(block, newline, carriage_return):
+    """Splits a block of whole lines (ending with newline) like a file opened with
+    universal newlines would, without treating other control characters as line breaks
+    """
+    lines = block.split(newline)
+    if lines and not lines[-1]:
+        lines.pop()
+    return [
+        line[:-1] if line.endswith(carriage_return) else line for line in lines
+    ]
+
+
+def _lazy_read_fwf_bytes(fwf_file, encoding, offsets, padding_char):
+    """Reads an opened (binary) fwf file whose offsets are in bytes, BYTES_PER_BLOCK
+    at a time, cut at the last line terminator of each block
+
+    Args:
+        fwf_file (file): fwf file opened in binary mode
+        encoding (str): multibyte encoding of fwf file
+        offsets (list[int]): lengths of each column in fwf (in bytes)
+        padding_char (str): padding character uses in fwf to fill gaps
+
+    Yields:
+        row[list[str]]: parsed rows
+    """
+    remainder = b""
+    with fwf_file:
+        while True:
+            block = fwf_file.read(BYTES_PER_BLOCK)
+            if not block:
+                break
+            block = remainder + block
+            cut_at = block.rfind(b"\n") + 1
+            block, remainder = block[:cut_at], block[cut_at:]
+            yield from _parse_fwf_byte_block(block, offsets, padding_char, encoding)
+    if remainder:
+        # NOTE last line without a terminator
+        yield from _parse_fwf_byte_block(
+            remainder + b"\n", offsets, padding_char, encoding
+        )
+
+
+def _lazy_read_fwf(
+    fwf_path,
+    encoding,
+    offsets,
+    padding_char,
+    columnNames,
+    column_types=None,
+    scales=None,
+    terminator="\n",
+    width_unit="characters",
+):
     """Reads and fwf file and returns a generator of parsed data
 
     Args:
@@ -194,34 +842,83 @@ def _lazy_read_fwf(fwf_path, encoding, offsets, padding_char, columnNames):
         offsets (list[str]): lengths of each column in fwf
         padding_char (str): padding character uses in fwf to fill gaps
         columnNames (list[str]): names of each column in fwf
+        column_types (list[str], optional): type of each column. Defaults to None (all text).
+        scales (list[int], optional): implied decimal places of columns. Defaults to None.
+        terminator (str, optional): record terminator for EBCDIC/binary layouts.
+                                    Defaults to "\n".
+        width_unit (str, optional): whether offsets are in "characters" or "bytes".
+                                    Defaults to "characters".
 
     Returns:
         rows[chain]: generator of header + data
     """
     header = [columnNames]
+    if _is_byte_width_layout(encoding, width_unit):
+        rows = _lazy_read_fwf_bytes(
+            fwf_file=_open_fwf_source(fwf_path),
+            encoding=encoding,
+            offsets=offsets,
+            padding_char=padding_char,
+        )
+        rows = _dedup_header(header[0], rows)
+        return chain(header, rows)
+    if _is_binary_layout(encoding, column_types):
+        rows = _lazy_read_fwf_records(
+            fwf_file=_open_fwf_source(fwf_path),
+            encoding=encoding,
+            offsets=offsets,
+            padding_char=padding_char,
+            columnNames=columnNames,
+            column_types=column_types,
+            scales=scales,
+            terminator=terminator,
+        )
+        return chain(header, rows)
     rows = (
         _parse_fwf_line(
             line=fwf_line.rstrip("\n"), offsets=offsets, padding_char=padding_char
         )
-        for fwf_line in open(fwf_path, "r", encoding=encoding)
+        for fwf_line in io.TextIOWrapper(_open_fwf_source(fwf_path), encoding=encoding)
     )
     rows = _dedup_header(header[0], rows)
     return chain(header, rows)
 
 
-def data_to_csv(data, csv_path="", header=True, sep="\t", encoding=None):
-    """Writes data (list/generator) to a csv file
+def data_to_csv(
+    data,
+    csv_path="",
+    header=True,
+    sep="\t",
+    encoding=None,
+    partition_by=None,
+    max_rows_per_file=None,
+    max_bytes_per_file=None,
+):
+    """Writes data (list/generator) to a csv file, or with partition_by/max_rows_per_file/
+    max_bytes_per_file to csv part files in the csv_path directory, in the same pass
 
     Args:
         data (generator/list/chain): data to be written
-        csv_path (str, optional): path to generate csv file at. Defaults to "".
+        csv_path (str/file, optional): path to generate csv file at
+                                       or a writable binary file object,
+                                       the (empty) directory to write part files
+                                       to when partitioning. Defaults to "".
         header (bool, optional): boolean to include header or not. Defaults to True.
         sep (str, optional): delimiter to be used in the csv. Defaults to "\t".
         encoding (str, optional): encoding of the csv file. Defaults to None.
+        partition_by (list[str], optional): columns to partition rows on, into Hive style
+                                            column=value directories. Defaults to None.
+        max_rows_per_file (int, optional): rows after which a part file is rolled over.
+                                           Defaults to None.
+        max_bytes_per_file (int, optional): bytes after which a part file is rolled over.
+                                            Defaults to None.
 
     Raises:
         ValueError: if a path to csv is not given
+        ValueError: if a partition column is not in the header
+        ValueError: if the directory to write part files to is not empty
         TypeError: if the data is not a list or generator/chain
+        TypeError: if csv_path is not a path when partitioning
     """
     if encoding is None:
         encoding = sys.getdefaultencoding()
@@ -229,46 +926,298 @@ def data_to_csv(data, csv_path="", header=True, sep="\t", encoding=None):
         raise ValueError("path to csv should be given")
     if not isinstance(data, (list, types.GeneratorType, chain)):
         raise TypeError("data must be a list or generator")
-    with open(csv_path, "w", encoding=encoding) as csv_file:
+    if partition_by or max_rows_per_file or max_bytes_per_file:
+        if not isinstance(csv_path, (str, os.PathLike)):
+            raise TypeError("path to a directory should be given to partition csv")
+        data = iter(data)
+        _write_csv_partitions(
+            data=data,
+            head=next(data),
+            directory=csv_path,
+            header=header,
+            sep=sep,
+            encoding=encoding,
+            partition_by=partition_by,
+            max_rows=max_rows_per_file,
+            max_bytes=max_bytes_per_file,
+            rows_per_batch=ROWS_PER_BATCH,
+        )
+        return
+    with _open_sink(csv_path) as csv_file:
         # csv_writer = csv.writer(
         #     csv_file, delimiter=sep, escapechar='//', quoting=csv.QUOTE_NONE)
-        if isinstance(data, list):
-            head = data[0]
-            data = data[1:]
-        else:
-            head = next(data)
+        data = iter(data)
+        head = next(data)
         if header:
             # csv_writer.writerow(head)
-            csv_file.write(sep.join(head))
-            csv_file.write("\n")
-        # csv_writer.writerows(data)
-        for d in data:
-            csv_file.write(sep.join(d) + "\n")
+            csv_file.write((sep.join(head) + "\n").encode(encoding))
+        # NOTE rows are joined and encoded ROWS_PER_BATCH at a time
+        while True:
+            lines = [sep.join(d) for d in islice(data, ROWS_PER_BATCH)]
+            if not lines:
+                break
+            lines.append("")
+            csv_file.write("\n".join(lines).encode(encoding))
     return
 
 
-def _generate_fwf_row(characterSet, offsets):
+def _sql_identifier(name):
+    """Quotes a table/column name for sqlite"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sql_column_types(column_types, scales, offsets=None):
+    """Maps the spec's column types onto sqlite column types, decimals wider than
+    sqlite holds exactly (or of unknown width) are TEXT so no digit is lost
+    """
+    offsets = offsets or [None] * len(column_types)
+    sql_types = []
+    for ctype, scale, offset in zip(column_types, scales, offsets):
+        digits = None if offset is None else _decimal_digits(ctype, offset)
+        if ctype == "text" or digits is None:
+            sql_types.append("TEXT")
+        elif not scale and digits <= SQLITE_INTEGER_DIGITS:
+            sql_types.append("INTEGER")
+        elif scale and digits <= SQLITE_REAL_DIGITS:
+            sql_types.append("NUMERIC")
+        else:
+            sql_types.append("TEXT")
+    return sql_types
+
+
+def data_to_sqlite(
+    data,
+    db_path="",
+    table="",
+    column_types=None,
+    scales=None,
+    if_exists="append",
+    offsets=None,
+):
+    """Bulk loads data (list/generator) into a sqlite table, created from the header.
+    Rows are inserted with executemany, ROWS_PER_BATCH at a time, and committed every
+    ROWS_PER_TRANSACTION rows, with SQLITE_LOAD_PRAGMAS set for the load
+
+    Args:
+        data (generator/list/chain): header + rows to be loaded
+        db_path (str/sqlite3.Connection, optional): path to sqlite database
+                                                    or an open connection. Defaults to "".
+        table (str, optional): name of the table to load into. Defaults to "".
+        column_types (list[str], optional): spec type of each column,
+                                            declared as sqlite types. Defaults to None (text).
+        scales (list[int], optional): implied decimal places of columns. Defaults to None.
+        if_exists (str, optional): "append" to, "replace" or "fail" on an existing table.
+                                   Defaults to "append".
+        offsets (list[int], optional): width of each column, decimals are only declared
+                                       INTEGER/NUMERIC if their digits fit exactly.
+                                       Defaults to None (TEXT).
+
+    Raises:
+        ValueError: if a database/table is not given or if_exists is not supported
+        ValueError: if the table exists and if_exists is "fail"
+        TypeError: if the data is not a list or generator/chain
+    """
+    if not db_path:
+        raise ValueError("path to sqlite database should be given")
+    if not table:
+        raise ValueError("table should be given")
+    if if_exists not in SQLITE_IF_EXISTS:
+        raise ValueError(f"if_exists can only be: {SQLITE_IF_EXISTS}")
+    if not isinstance(data, (list, types.GeneratorType, chain)):
+        raise TypeError("data must be a list or generator")
+    data = iter(data)
+    head = next(data)
+    column_types = column_types or ["text"] * len(head)
+    scales = scales or [0] * len(head)
+    columns = ", ".join(
+        f"{_sql_identifier(name)} {sql_type}"
+        for name, sql_type in zip(
+            head, _sql_column_types(column_types, scales, offsets)
+        )
+    )
+    insert = (
+        f"INSERT INTO {_sql_identifier(table)} "
+        f"VALUES ({', '.join(['?'] * len(head))})"
+    )
+    owned = not isinstance(db_path, sqlite3.Connection)
+    connection = sqlite3.connect(db_path) if owned else db_path
+    restore = {
+        pragma: connection.execute(f"PRAGMA {pragma}").fetchone()[0]
+        for pragma in SQLITE_LOAD_PRAGMAS
+    }
+    try:
+        for pragma, value in SQLITE_LOAD_PRAGMAS.items():
+            connection.execute(f"PRAGMA {pragma} = {value}")
+        with connection:
+            exists = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (table,),
+            ).fetchone()
+            if exists and if_exists == "fail":
+                raise ValueError(f"table {table} already exists")
+            if exists and if_exists == "replace":
+                connection.execute(f"DROP TABLE {_sql_identifier(table)}")
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {_sql_identifier(table)} ({columns})"
+            )
+        rows = (row for row in data if row)
+        while True:
+            with connection:
+                loaded = 0
+                while loaded < ROWS_PER_TRANSACTION:
+                    batch = list(islice(rows, ROWS_PER_BATCH))
+                    if not batch:
+                        break
+                    connection.executemany(insert, batch)
+                    loaded += len(batch)
+            if loaded < ROWS_PER_TRANSACTION:
+                break
+    finally:
+        for pragma, value in restore.items():
+            connection.execute(f"PRAGMA {pragma} = {value}")
+        if owned:
+            connection.close()
+    return
+
+
+def _csv_columns(csv_header, columnNames):
+    """Finds the position of each of columnNames in the header of a csv
+
+    Args:
+        csv_header (list[str]): header row of the csv
+        columnNames (list[str]): names of each column in fwf
+
+    Raises:
+        ValueError: if a column of the fwf is not in the csv
+
+    Returns:
+        list[int]: position in the csv row of each fwf column
+    """
+    missing = [name for name in columnNames if name not in csv_header]
+    if missing:
+        raise ValueError(f"Columns not found in csv header: {missing}")
+    return [csv_header.index(name) for name in columnNames]
+
+
+def _lazy_read_csv(
+    csv_file, columnNames, sep="\t", quotechar=None, header=True,
+):
+    """Reads an opened delimited file and returns a generator of rows, with the csv
+    columns mapped (by header name) onto the fwf columns. Blank lines are skipped,
+    they are not records
+
+    Args:
+        csv_file (file): csv file opened in text mode
+        columnNames (list[str]): names of each column in fwf
+        sep (str, optional): delimiter used in the csv file. Defaults to "\t".
+        quotechar (str, optional): quote character of the csv,
+                                   None if fields are not quoted. Defaults to None.
+        header (bool, optional): whether the csv starts with a header, columns are mapped
+                                 by position without one. Defaults to True.
+
+    Raises:
+        ValueError: if a row has fewer columns than needed
+
+    Returns:
+        rows[chain]: generator of header (columnNames) + data
+    """
+    if quotechar is None:
+        reader = csv.reader(csv_file, delimiter=sep, quoting=csv.QUOTE_NONE)
+    else:
+        reader = csv.reader(csv_file, delimiter=sep, quotechar=quotechar)
+    columns = list(range(len(columnNames)))
+    if header:
+        try:
+            columns = _csv_columns(next(reader, columnNames), columnNames)
+        except Exception:
+            csv_file.close()
+            raise
+    if columns == list(range(len(columnNames))):
+        pick = None
+    elif len(columns) == 1:
+        pick = lambda row: [row[columns[0]]]  # noqa: E731
+    else:
+        pick = itemgetter(*columns)
+
+    needed = max(columns, default=-1) + 1
+
+    def rows():
+        with csv_file:
+            for row in reader:
+                if not row:
+                    continue
+                if len(row) < needed:
+                    raise ValueError(
+                        f"Line {reader.line_num} of csv has fewer columns than needed"
+                    )
+                elif pick is None:
+                    yield row[:needed]
+                else:
+                    yield list(pick(row))
+
+    return chain([columnNames], rows())
+
+
+def _generate_decimal(column_type, offset, scale=0, rng=random):
+    """Generates a random number string that fits in a packed/zoned column"""
+    nb_digits = _decimal_digits(column_type, offset)
+    if not nb_digits:
+        return ""
+    digits = "".join(rng.choices("0123456789", k=rng.randint(1, nb_digits)))  # nosec
+    return _format_decimal(digits, rng.choice(["", "-"]), scale)  # nosec
+
+
+def _generate_fwf_row(
+    characterSet, offsets, column_types=None, scales=None, rng=random
+):
     """Generates a random fwf line
 
     Args:
         characterSet (str): valid to pick characters from
         offsets (list[int]): lengths of each field
+        column_types (list[str], optional): type of each field. Defaults to None (all text).
+        scales (list[int], optional): implied decimal places of each field. Defaults to None.
+        rng (random.Random, optional): random generator to use. Defaults to random.
 
     Returns:
         line(str): line formatted in fwf
     """
+    if column_types is None or all(ctype == "text" for ctype in column_types):
+        return [
+            "".join(rng.choices(characterSet, k=rng.randint(0, off)))  # nosec
+            for off in offsets
+        ]
     return [
-        "".join(random.choices(characterSet, k=random.randint(0, off)))  # nosec
-        for off in offsets
+        "".join(rng.choices(characterSet, k=rng.randint(0, off)))  # nosec
+        if ctype == "text"
+        else _generate_decimal(ctype, off, scale, rng)
+        for ctype, off, scale in zip(
+            column_types, offsets, scales or [0] * len(offsets)
+        )
     ]
 
 
-def _lazy_generate_fwf(characterSet, offsets, columnNames, length=None):
+def _lazy_generate_fwf(
+    characterSet,
+    offsets,
+    columnNames,
+    length=None,
+    column_types=None,
+    scales=None,
+    seed=None,
+):
+    rng = random if seed is None else random.Random(seed)  # nosec
     if length is None:
-        length = random.randint(1, 1000)  # nosec
+        length = rng.randint(1, 1000)  # nosec
     header = [columnNames]
     rows = (
-        _generate_fwf_row(characterSet=characterSet, offsets=offsets)
+        _generate_fwf_row(
+            characterSet=characterSet,
+            offsets=offsets,
+            column_types=column_types,
+            scales=scales,
+            rng=rng,
+        )
         for _ in range(length)
     )
     return chain(header, rows)
@@ -286,8 +1235,190 @@ def _row_to_line(row, offsets, padding_char):
     return padded_row
 
 
+def _row_to_bytes_line(row, offsets, padding_char, encoding):
+    """Encodes a row as an fwf line with offsets in bytes, values longer than their
+    offset are cut at the last whole character that fits
+
+    Args:
+        row (list[str]): values of each column
+        offsets (list[int]): length of each field in the fwf line (in bytes)
+        padding_char (str): single byte padding character used in fwf
+        encoding (str): encoding of the fwf file
+
+    Returns:
+        line[bytes]: encoded line without terminator
+    """
+    padding = padding_char.encode(encoding)
+    line = b""
+    for text, offset in zip(row, offsets):
+        field = text.encode(encoding)
+        if len(field) > offset:
+            field = field[:offset].decode(encoding, "ignore").encode(encoding)
+        line += field + padding * (offset - len(field))
+    return line
+
+
+def _row_to_record(row, fields, padding_char, encoding):
+    """Encodes a row as a fixed length (byte) record, text columns are padded and encoded,
+    packed/zoned columns are packed
+
+    Args:
+        row (list[str]): values of each column
+        fields (list[tuple]): (column_type, start, end, scale) of each column
+        padding_char (str): padding character used in fwf
+        encoding (str): single byte encoding of the fwf file
+
+    Returns:
+        record[bytes]: record without terminator
+    """
+    record = b""
+    for text, (ctype, start, end, scale) in zip(row, fields):
+        if ctype == "text":
+            record += _row_to_line(
+                row=[text], offsets=[end - start], padding_char=padding_char
+            ).encode(encoding)
+        else:
+            record += DECIMAL_ENCODERS[ctype](text, end - start, scale, encoding)
+    return record
+
+
+def _fwf_layout(
+    offsets,
+    padding_char,
+    encoding,
+    column_types=None,
+    scales=None,
+    terminator="\n",
+    width_unit="characters",
+):
+    """Collects everything needed to encode rows as fwf records into a (picklable) dict
+
+    Args:
+        offsets (list[int]): lengths of each column in fwf
+        padding_char (str): padding character used in fwf
+        encoding (str): encoding of the fwf file
+        column_types (list[str], optional): type of each column. Defaults to None (all text).
+        scales (list[int], optional): implied decimal places of columns. Defaults to None.
+        terminator (str, optional): record terminator for EBCDIC/binary layouts.
+                                    Defaults to "\n".
+        width_unit (str, optional): whether offsets are in "characters" or "bytes".
+                                    Defaults to "characters".
+
+    Returns:
+        layout[dict]: kind ("records", "bytes" or "text") of layout and how to encode it
+    """
+    if _is_binary_layout(encoding, column_types):
+        kind = "records"
+        terminator = terminator.encode(encoding)
+    elif _is_byte_width_layout(encoding, width_unit):
+        kind = "bytes"
+        terminator = b"\n"
+    else:
+        kind = "text"
+        terminator = "\n".encode(encoding)
+    return {
+        "kind": kind,
+        "offsets": offsets,
+        "padding_char": padding_char,
+        "encoding": encoding,
+        "fields": _column_fields(offsets, column_types, scales),
+        "header_fields": _column_fields(offsets),
+        "terminator": terminator,
+    }
+
+
+def _fixed_record_length(layout):
+    """Length in bytes of every record (including terminator) of a layout,
+    None if records vary in length (multibyte encodings with offsets in characters)
+    """
+    if layout["kind"] == "text" and layout["encoding"] in MULTIBYTE_ENCODINGS:
+        return None
+    return sum(layout["offsets"]) + len(layout["terminator"])
+
+
+def _row_to_fwf_bytes(row, layout, header=False):
+    """Encodes a row as an fwf record (including terminator) of the given layout
+
+    Args:
+        row (list[str]): values of each column
+        layout (dict): layout from _fwf_layout
+        header (bool, optional): whether the row is the header. Defaults to False.
+
+    Returns:
+        record[bytes]: encoded record
+    """
+    if layout["kind"] == "records":
+        fields = layout["header_fields"] if header else layout["fields"]
+        record = _row_to_record(
+            row, fields, layout["padding_char"], layout["encoding"]
+        )
+    elif layout["kind"] == "bytes":
+        record = _row_to_bytes_line(
+            row, layout["offsets"], layout["padding_char"], layout["encoding"]
+        )
+    else:
+        record = _row_to_line(
+            row=row, offsets=layout["offsets"], padding_char=layout["padding_char"]
+        ).encode(layout["encoding"])
+    return record + layout["terminator"]
+
+
+def _rows_to_fwf_bytes(rows, layout):
+    """Encodes a batch of rows as fwf records in bulk, text layouts are padded as str
+    and encoded at once for the whole batch
+
+    Args:
+        rows (list[list[str]]): rows to encode
+        layout (dict): layout from _fwf_layout
+
+    Returns:
+        records[bytes]: encoded records, each with its terminator
+    """
+    if not rows:
+        return b""
+    if layout["kind"] != "text":
+        return b"".join(_row_to_fwf_bytes(row, layout) for row in rows)
+    offsets, padding_char = layout["offsets"], layout["padding_char"]
+    lines = [
+        _row_to_line(row=row, offsets=offsets, padding_char=padding_char)
+        for row in rows
+    ]
+    lines.append("")
+    return "\n".join(lines).encode(layout["encoding"])
+
+
+def _write_fwf_batches(data, fwf_file, layout, header=True):
+    """Writes header + rows to an (binary) fwf file, ROWS_PER_BATCH rows at a time
+
+    Args:
+        data (generator/list/chain): header + rows to be written
+        fwf_file (file): fwf file opened in binary mode
+        layout (dict): layout from _fwf_layout
+        header (bool, optional): boolean to include header or not. Defaults to True.
+    """
+    data = iter(data)
+    head = next(data)
+    if header:
+        fwf_file.write(_row_to_fwf_bytes(head, layout, header=True))
+    while True:
+        batch = list(islice(data, ROWS_PER_BATCH))
+        if not batch:
+            break
+        fwf_file.write(_rows_to_fwf_bytes(batch, layout))
+    return
+
+
 def data_to_fwf(
-    data, fwf_path="", offsets=None, header=True, padding_char="\t", encoding=None,
+    data,
+    fwf_path="",
+    offsets=None,
+    header=True,
+    padding_char="\t",
+    encoding=None,
+    column_types=None,
+    scales=None,
+    terminator="\n",
+    width_unit="characters",
 ):
     if encoding is None:
         encoding = sys.getdefaultencoding()
@@ -297,25 +1428,15 @@ def data_to_fwf(
         raise TypeError("data must be a list or generator")
     if offsets is None:
         raise ValueError("offsets must be given")
-
-    with open(fwf_path, "w", encoding=encoding) as fwf_file:
-        # csv_writer = csv.writer(
-        #     csv_file, delimiter=sep, escapechar='//', quoting=csv.QUOTE_NONE)
-        if isinstance(data, list):
-            head = data[0]
-            data = data[1:]
-        else:
-            head = next(data)
-        if header:
-            # csv_writer.writerow(head)
-            fwf_file.write(
-                _row_to_line(row=head, offsets=offsets, padding_char=padding_char)
-            )
-            fwf_file.write("\n")
-        # csv_writer.writerows(data)
-        for d in data:
-            fwf_file.write(
-                _row_to_line(row=d, offsets=offsets, padding_char=padding_char) + "\n"
-            )
-
+    layout = _fwf_layout(
+        offsets=offsets,
+        padding_char=padding_char,
+        encoding=encoding,
+        column_types=column_types,
+        scales=scales,
+        terminator=terminator,
+        width_unit=width_unit,
+    )
+    with _open_sink(fwf_path) as fwf_file:
+        _write_fwf_batches(data=data, fwf_file=fwf_file, layout=layout, header=header)
     return
@@ -1,19 +1,41 @@
+import io
 import json
 import os
+import random
+import sqlite3
 import types
 from itertools import chain
 
 import pytest
+from fwfparser import dedupe, parallel, partition, profiling, records, utils
 from fwfparser.__main__ import main
-from fwfparser.fwf import DataFrameF, fwf_to_csv, read_fwf
+from fwfparser.fwf import (  # isort:skip
+    DataFrameF,  # isort:skip
+    csv_to_fwf,  # isort:skip
+    diff_fwf,  # isort:skip
+    fwf_to_csv,  # isort:skip
+    fwf_to_sqlite,  # isort:skip
+    generate_fwf_file,  # isort:skip
+    infer_spec,  # isort:skip
+    profile_fwf,  # isort:skip
+    read_fwf,  # isort:skip
+)
 
 from fwfparser.utils import (  # isort:skip
+    _decode_packed,  # isort:skip
+    _decode_zoned,  # isort:skip
     _dedup_header,  # isort:skip
+    _encode_packed,  # isort:skip
+    _encode_zoned,  # isort:skip
     _generate_fwf_row,  # isort:skip
     _lazy_generate_fwf,  # isort:skip
+    _lazy_read_csv,  # isort:skip
     _lazy_read_fwf,  # isort:skip
     _parse_fwf_line,  # isort:skip
+    _row_to_bytes_line,  # isort:skip
     _row_to_line,  # isort:skip
+    data_to_csv,  # isort:skip
+    parse_spec_file,  # isort:skip
 )
 
 DEFAULT_OUTPUT = "sample_output.csv"
@@ -27,6 +49,9 @@ VALID_CSV_NLN_FILE = "tests/test_csv_valid_nln.csv"
 TMP_CSV = "test.csv"
 TMP_FWF = "test.txt"
 TMP_SPECS = "test.json"
+# NOTE binary fixtures can not be named test*.txt, pytest collects those as doctests
+TMP_DAT = "test.dat"
+TMP_DB = "test.db"
 
 ALPHABET = "abcdefghijklmnopqrstuvwxyz"
 # TODO tmpdir
@@ -254,6 +279,37 @@ class TestDataFrameF:
             warn[0].message.args[0]
         )
 
+    def test_lazy_read_fwf(self):
+        df = DataFrameF().read_fwf(
+            spec_path=VALID_SPEC_FILE, fwf_path=VALID_FWF_FILE, lazy=True
+        )
+        assert df.rows == []
+        with open(VALID_CSV_FILE, "r") as v:
+            valid = list(map(lambda x: x.split("\t"), v.read().splitlines()))
+        chunks = list(df.iter_chunks(rows=3))
+        assert [len(chunk) for chunk in chunks][:-1] == [3] * (len(chunks) - 1)
+        assert [row for chunk in chunks for row in chunk] == valid[1:]
+        df.to_csv(TMP_CSV)
+        assert are_these_same(VALID_CSV_FILE, TMP_CSV)
+        assert df.materialize().rows == valid
+        assert not df.lazy
+
+    def test_lazy_missing_fwf(self):
+        with pytest.raises(FileNotFoundError):
+            DataFrameF(VALID_SPEC_FILE).read_fwf(fwf_path="missing.txt", lazy=True)
+
+    def test_lazy_random_fwf_data(self):
+        df = DataFrameF().random_fwf_data(
+            spec_path=VALID_SPEC_FILE, length=20, lazy=True
+        )
+        assert df.rows == []
+        first = [row for chunk in df.iter_chunks(rows=7) for row in chunk]
+        assert len(first) == 20
+        assert first == [row for chunk in df.iter_chunks(rows=7) for row in chunk]
+        df.to_fwf(spec_path=VALID_SPEC_FILE, fwf_path=TMP_FWF)
+        parsed = DataFrameF().read_fwf(spec_path=VALID_SPEC_FILE, fwf_path=TMP_FWF)
+        assert parsed.rows[1:] == first
+
     def test_parse(self, tmpdir):
         DataFrameF().read_fwf(
             spec_path=VALID_SPEC_FILE, fwf_path=VALID_FWF_FILE
@@ -369,3 +425,678 @@ class TestUtils:
 
         gen = chain([header_row], (_ for _ in rows))
         assert rows == list(_dedup_header(header_row=header_row, rows=gen))
+
+
+EBCDIC_SPECS = {
+    "ColumnNames": ["name", "amt", "cnt"],
+    "Offsets": ["4", "3", "3"],
+    "FixedWidthEncoding": "cp037",
+    "IncludeHeader": "False",
+    "DelimitedEncoding": "utf-8",
+    "ColumnTypes": ["text", "packed", "zoned"],
+    "ColumnScales": ["0", "2", "0"],
+    "RecordTerminator": "",
+}
+
+
+class TestEbcdic:
+    def test_decode_packed(self):
+        assert _decode_packed(b"\x12\x34\x5c".hex()) == "12345"
+        assert _decode_packed(b"\x12\x34\x5d".hex(), scale=2) == "-123.45"
+        assert _decode_packed(b"\x00\x00\x5c".hex(), scale=2) == "0.05"
+        assert _decode_packed(b"\x00\x0d".hex()) == "0"
+        for invalid in [b"\x12\x34", b"\x12\x33", b"\x12\x37"]:
+            with pytest.raises(ValueError):
+                _decode_packed(invalid.hex())
+
+    def test_decode_zoned(self):
+        assert _decode_zoned("123".encode("cp037").hex(), encoding="cp037") == "123"
+        assert _decode_zoned(b"\xf1\xf2\xd3".hex(), encoding="cp037") == "-123"
+        assert _decode_zoned(b"123".hex()) == "123"
+        assert _decode_zoned(b"12w".hex(), encoding="cp1252") == "-127"
+        with pytest.raises(ValueError):
+            _decode_zoned(b"\xf1\x12".hex(), encoding="cp037")
+
+    def test_decode_zoned_invalid_zones(self):
+        invalid = [
+            ("AB1".encode("cp037"), "cp037"),
+            (b"AB1", "cp1252"),
+            (b"\x40\x40\xf1", "cp037"),
+            (b"  1", "cp1252"),
+            (b"\xf1\xf2\x33", "cp037"),
+            (b"\x31\x32\xc3", "cp1252"),
+        ]
+        for field, encoding in invalid:
+            with pytest.raises(ValueError):
+                _decode_zoned(field.hex(), encoding=encoding)
+
+    def test_encode_decimals(self):
+        assert _encode_packed("-123.45", 3, 2) == b"\x12\x34\x5d"
+        assert _encode_packed("7", 2) == b"\x00\x7c"
+        assert _encode_zoned("-12", 3, encoding="cp037") == b"\xf0\xf1\xd2"
+        with pytest.raises(ValueError):
+            _encode_packed("123456", 3)
+
+    def test_unknown_column_type(self):
+        specs = dict(EBCDIC_SPECS, ColumnTypes=["text", "float", "zoned"])
+        with pytest.raises(ValueError):
+            parse_spec_file(specs)
+
+    def test_read_ebcdic(self):
+        change_these_in_valid_specs(EBCDIC_SPECS)
+        with open(TMP_DAT, "wb") as t:
+            t.write("ab".encode("cp037") + b"\x40\x40\x12\x34\x5d" + b"\xf0\xf4\xc2")
+            t.write("wxyz".encode("cp037") + b"\x00\x00\x1c" + b"\xf0\xf0\xf0")
+        rows = list(read_fwf(spec_path=TMP_SPECS, fwf_path=TMP_DAT))
+        assert rows == [
+            ["name", "amt", "cnt"],
+            ["ab", "-123.45", "42"],
+            ["wxyz", "0.01", "0"],
+        ]
+
+    def test_generate_ebcdic_round_trip(self):
+        change_these_in_valid_specs(dict(EBCDIC_SPECS, IncludeHeader="True"))
+        generate_fwf_file(spec_path=TMP_SPECS, fwf_path=TMP_DAT, length=50)
+        assert os.stat(TMP_DAT).st_size == 10 * 51
+        df = DataFrameF().read_fwf(spec_path=TMP_SPECS, fwf_path=TMP_DAT)
+        assert len(df.rows) == 51
+        df.to_fwf(spec_path=TMP_SPECS, fwf_path=TMP_CSV)
+        assert list(read_fwf(spec_path=TMP_SPECS, fwf_path=TMP_CSV)) == df.rows
+
+
+UTF8_SPECS = {
+    "ColumnNames": ["a", "b"],
+    "Offsets": ["3", "4"],
+    "FixedWidthEncoding": "utf-8",
+    "IncludeHeader": "True",
+    "DelimitedEncoding": "utf-8",
+}
+
+
+class TestMultibyte:
+    def test_read_utf8_characters(self):
+        change_these_in_valid_specs(UTF8_SPECS)
+        with open(TMP_DAT, "w", encoding="utf-8") as t:
+            t.write("a  b   \nééé€ab \n")
+        rows = list(read_fwf(spec_path=TMP_SPECS, fwf_path=TMP_DAT))
+        assert rows == [["a", "b"], ["ééé", "€ab"]]
+
+    def test_read_utf8_bytes(self, monkeypatch):
+        # NOTE small blocks, so that ascii and multibyte blocks and lines cut
+        # across blocks are all exercised
+        monkeypatch.setattr(utils, "BYTES_PER_BLOCK", 16)
+        change_these_in_valid_specs(dict(UTF8_SPECS, WidthUnit="bytes"))
+        lines = ["a  b   ", "xyzwxyz", "é € ", "ab éé", "abcd   "] * 3
+        with open(TMP_DAT, "wb") as t:
+            t.write("\r\n".join(lines).encode("utf-8"))
+        rows = list(read_fwf(spec_path=TMP_SPECS, fwf_path=TMP_DAT))
+        assert rows[0] == ["a", "b"]
+        assert rows[1:5] == [["xyz", "wxyz"], ["é", "€"], ["ab", "éé"], ["abc", "d"]]
+        assert len(rows) == 15
+
+    def test_read_utf8_bytes_split_character(self):
+        change_these_in_valid_specs(dict(UTF8_SPECS, WidthUnit="bytes"))
+        with open(TMP_DAT, "wb") as t:
+            t.write("aaé€  \n".encode("utf-8"))
+        with pytest.raises(ValueError):
+            list(read_fwf(spec_path=TMP_SPECS, fwf_path=TMP_DAT))
+
+    def test_row_to_bytes_line(self):
+        line = _row_to_bytes_line(["é€", "ab"], [4, 2], " ", "utf-8")
+        assert line == "é  ab".encode("utf-8")
+        assert len(line) == 6
+
+    def test_generate_utf8_bytes_round_trip(self):
+        change_these_in_valid_specs(dict(UTF8_SPECS, WidthUnit="bytes"))
+        generate_fwf_file(spec_path=TMP_SPECS, fwf_path=TMP_DAT, length=50)
+        with open(TMP_DAT, "rb") as t:
+            assert all(len(line) == 8 for line in t)
+        df = DataFrameF().read_fwf(spec_path=TMP_SPECS, fwf_path=TMP_DAT)
+        assert len(df.rows) == 51
+
+
+class TestParallel:
+    def test_to_fwf_parallel(self, monkeypatch):
+        monkeypatch.setattr(parallel, "ROWS_PER_TASK", 7)
+        lengths = []
+        create_fwf_file = parallel._create_fwf_file
+
+        def spy(*args, **kwargs):
+            lengths.append(args[-1])
+            return create_fwf_file(*args, **kwargs)
+
+        monkeypatch.setattr(parallel, "_create_fwf_file", spy)
+        df = DataFrameF().random_fwf_data(spec_path=VALID_SPEC_FILE, length=50)
+        df.to_fwf(spec_path=VALID_SPEC_FILE, fwf_path=TMP_FWF)
+        df.to_fwf(spec_path=VALID_SPEC_FILE, fwf_path=TMP_DAT, processes=3)
+        assert lengths == [50]
+        with open(TMP_FWF, "rb") as f, open(TMP_DAT, "rb") as t:
+            assert f.read() == t.read()
+
+    def test_lazy_to_fwf_parallel(self, monkeypatch):
+        monkeypatch.setattr(parallel, "ROWS_PER_TASK", 4)
+        df = DataFrameF().read_fwf(
+            spec_path=VALID_SPEC_FILE, fwf_path=VALID_FWF_FILE, lazy=True
+        )
+        df.to_fwf(spec_path=VALID_SPEC_FILE, fwf_path=TMP_DAT, processes=2)
+        with open(VALID_FWF_FILE, "rb") as v, open(TMP_DAT, "rb") as t:
+            assert v.read() == t.read()
+
+    def test_to_fwf_parallel_rows(self, monkeypatch):
+        monkeypatch.setattr(parallel, "ROWS_PER_TASK", 4)
+        with open(VALID_FWF_FILE, "rb") as v:
+            head, *lines = v.read().splitlines(keepends=True)
+        with open(TMP_DAT, "wb") as t:
+            t.write(b"".join([head] + lines[:5] + [b"\n"] + lines[5:]))
+        for lazy in [False, True]:
+            df = DataFrameF().read_fwf(
+                spec_path=VALID_SPEC_FILE, fwf_path=TMP_DAT, lazy=lazy
+            )
+            df.to_fwf(spec_path=VALID_SPEC_FILE, fwf_path=TMP_FWF, processes=2)
+            with open(VALID_FWF_FILE, "rb") as v, open(TMP_FWF, "rb") as f:
+                assert v.read() == f.read()
+        rows = list(read_fwf(spec_path=VALID_SPEC_FILE, fwf_path=VALID_FWF_FILE))
+        os.remove(TMP_FWF)
+        for data in [rows[:3] + [[], ["a", "b"]], iter(rows[:3] + [[], ["a", "b"]])]:
+            with pytest.raises(ValueError, match="Row 4 "):
+                parallel.data_to_fwf_parallel(
+                    data, TMP_FWF, [1] * 10, encoding="cp1252", processes=2
+                )
+            assert not os.path.exists(TMP_FWF)
+
+    def test_generate_fwf_file_parallel(self, monkeypatch):
+        monkeypatch.setattr(parallel, "ROWS_PER_TASK", 10)
+        generate_fwf_file(
+            spec_path=VALID_SPEC_FILE, fwf_path=TMP_DAT, length=35, processes=2
+        )
+        with open(VALID_SPEC_FILE, "r") as s:
+            offsets = list(map(int, json.loads(s.read())["Offsets"]))
+        assert os.stat(TMP_DAT).st_size == (sum(offsets) + 1) * 36
+        assert len(list(read_fwf(spec_path=VALID_SPEC_FILE, fwf_path=TMP_DAT))) == 36
+
+    def test_parallel_needs_fixed_length_records(self):
+        change_these_in_valid_specs(UTF8_SPECS)
+        with pytest.raises(ValueError):
+            generate_fwf_file(
+                spec_path=TMP_SPECS, fwf_path=TMP_DAT, length=5, processes=2
+            )
+
+
+class TestCsvToFwf:
+    def test_csv_to_fwf(self, monkeypatch):
+        monkeypatch.setattr(utils, "ROWS_PER_BATCH", 3)
+        csv_to_fwf(
+            spec_path=VALID_SPEC_FILE, csv_path=VALID_CSV_FILE, fwf_path=TMP_DAT
+        )
+        with open(VALID_FWF_FILE, "rb") as v, open(TMP_DAT, "rb") as t:
+            assert v.read() == t.read()
+
+    def test_csv_to_fwf_by_header_name(self):
+        change_these_in_valid_specs(
+            {"ColumnNames": ["b", "a"], "Offsets": ["2", "3"], "PaddingCharacter": "."}
+        )
+        with open(TMP_CSV, "w") as t:
+            t.write("a,x,b\n1,y,2\n\n333,z,44444\n")
+        csv_to_fwf(spec_path=TMP_SPECS, csv_path=TMP_CSV, fwf_path=TMP_DAT, sep=",")
+        with open(TMP_DAT, "r") as t:
+            assert t.read() == "b.a..\n2.1..\n44333\n"
+
+    def test_csv_to_fwf_blank_lines_ebcdic(self):
+        specs = dict(EBCDIC_SPECS, ColumnNames=["name", "amt"], Offsets=["4", "3"])
+        specs.update(ColumnTypes=["text", "packed"], ColumnScales=["0", "2"])
+        specs.update(IncludeHeader="True", RecordTerminator="\n")
+        change_these_in_valid_specs(specs)
+        csv = b"name\tamt\nab\t-1.5\n\ncd\t2.25\n"
+        sink = io.BytesIO()
+        csv_to_fwf(spec_path=TMP_SPECS, csv_path=csv, fwf_path=sink)
+        assert len(sink.getvalue()) == 3 * 8
+        rows = list(read_fwf(spec_path=TMP_SPECS, fwf_path=sink.getvalue()))
+        assert rows == [["name", "amt"], ["ab", "-1.50"], ["cd", "2.25"]]
+
+    def test_csv_to_fwf_missing_column(self):
+        with open(TMP_CSV, "w") as t:
+            t.write("f1\tf2\nab\tcd\n")
+        with pytest.raises(ValueError) as error:
+            csv_to_fwf(
+                spec_path=VALID_SPEC_FILE, csv_path=TMP_CSV, fwf_path=TMP_DAT
+            )
+        assert "Columns not found in csv header" in str(error.value)
+        csv_file = io.StringIO("f1\tf2\nab\tcd\n")
+        with pytest.raises(ValueError):
+            _lazy_read_csv(csv_file=csv_file, columnNames=["f1", "f3"])
+        assert csv_file.closed
+
+    def test_main_to_fwf(self):
+        main(spec=VALID_SPEC_FILE, csv=VALID_CSV_FILE, output=TMP_DAT, to="fwf")
+        with open(VALID_FWF_FILE, "rb") as v, open(TMP_DAT, "rb") as t:
+            assert v.read() == t.read()
+
+
+class TestInferSpec:
+    def test_infer_valid_fwf(self):
+        with open(VALID_SPEC_FILE, "r") as v:
+            valid = json.loads(v.read())
+        assert infer_spec(fwf_path=VALID_FWF_FILE) == valid
+
+    def test_infer_sampled(self):
+        change_these_in_valid_specs({"IncludeHeader": "False"})
+        generate_fwf_file(spec_path=TMP_SPECS, fwf_path=TMP_DAT, length=2000)
+        specs = infer_spec(
+            fwf_path=TMP_DAT, spec_path=TMP_CSV, sample_bytes=16 * 1024
+        )
+        with open(VALID_SPEC_FILE, "r") as v:
+            assert specs["Offsets"] == json.loads(v.read())["Offsets"]
+        assert specs["IncludeHeader"] == "False"
+        assert specs["ColumnNames"][:2] == ["f1", "f2"]
+        assert parse_spec_file(TMP_CSV)["Offsets"] == list(map(int, specs["Offsets"]))
+
+    def test_infer_multi_word_and_right_aligned(self):
+        rng = random.Random(42)
+        names = ["Jo Ann", "Bob Lee", "Mary", "Ann Marie", "Christophe", "Elizabeth"]
+        names += ["Jean Luc", "Margaret", "Robert", "Li Wei", "Samantha", "Peter"]
+        cities = ["New York", "Boston", "San Francisco", "Chicago", "Los Angeles"]
+        cities += ["Salt Lake City", "Denver", "St Louis"]
+        with open(TMP_DAT, "w") as t:
+            for _ in range(2000):
+                number = rng.randrange(10 ** rng.randint(1, 8))
+                t.write(f"{rng.choice(names):<10}{rng.choice(cities):<15}{number:>8d}\n")
+        specs = infer_spec(fwf_path=TMP_DAT, header=False)
+        assert specs["Offsets"] == ["10", "15", "8"]
+
+    def test_infer_uneven_records(self):
+        with open(TMP_DAT, "w") as t:
+            t.write("ab  cd\nabcd\nab  cd\nab  cd\n")
+        with pytest.raises(ValueError):
+            infer_spec(fwf_path=TMP_DAT)
+
+    def test_main_infer(self):
+        main(spec=TMP_SPECS, fwf=VALID_FWF_FILE, infer=True)
+        main(spec=TMP_SPECS, fwf=VALID_FWF_FILE, output=TMP_CSV)
+        assert are_these_same(VALID_CSV_FILE, TMP_CSV)
+
+
+class TestBuffers:
+    def valid(self):
+        with open(VALID_FWF_FILE, "rb") as v:
+            return v.read()
+
+    def test_read_fwf_buffers(self):
+        expected = list(read_fwf(spec_path=VALID_SPEC_FILE, fwf_path=VALID_FWF_FILE))
+        data = self.valid()
+        for fwf in [data, bytearray(data), memoryview(data), io.BytesIO(data)]:
+            assert list(read_fwf(spec_path=VALID_SPEC_FILE, fwf_path=fwf)) == expected
+
+    def test_read_fwf_leaves_file_open(self):
+        fwf = io.BytesIO(self.valid())
+        list(read_fwf(spec_path=VALID_SPEC_FILE, fwf_path=fwf))
+        assert not fwf.closed
+
+    def test_fwf_to_csv_sink(self):
+        with open(VALID_SPEC_FILE, "rb") as v:
+            spec = v.read()
+        sink = io.BytesIO()
+        fwf_to_csv(spec_path=spec, fwf_path=memoryview(self.valid()), csv_path=sink)
+        with open(VALID_CSV_FILE, "rb") as v:
+            assert sink.getvalue() == v.read()
+
+    def test_csv_to_fwf_buffers(self):
+        with open(VALID_CSV_FILE, "rb") as v:
+            csv = v.read()
+        sink = io.BytesIO()
+        with open(VALID_SPEC_FILE, "r") as spec:
+            csv_to_fwf(spec_path=spec, csv_path=csv, fwf_path=sink)
+        assert sink.getvalue() == self.valid()
+
+    def test_read_ebcdic_buffer(self):
+        change_these_in_valid_specs(EBCDIC_SPECS)
+        data = "ab".encode("cp037") + b"\x40\x40\x12\x34\x5d" + b"\xf0\xf4\xc2"
+        rows = list(read_fwf(spec_path=TMP_SPECS, fwf_path=data))
+        assert rows[1] == ["ab", "-123.45", "42"]
+
+    def test_lazy_buffer(self):
+        df = DataFrameF(VALID_SPEC_FILE).read_fwf(fwf_path=self.valid(), lazy=True)
+        assert len(list(df.iter_chunks())) == len(list(df.iter_chunks())) == 1
+        with pytest.raises(ValueError):
+            DataFrameF(VALID_SPEC_FILE).read_fwf(fwf_path=io.BytesIO(), lazy=True)
+
+    def test_invalid_source(self):
+        with pytest.raises(TypeError):
+            list(read_fwf(spec_path=VALID_SPEC_FILE, fwf_path=42))
+
+
+class TestSqlite:
+    def test_fwf_to_sqlite(self, monkeypatch):
+        monkeypatch.setattr(utils, "ROWS_PER_BATCH", 2)
+        monkeypatch.setattr(utils, "ROWS_PER_TRANSACTION", 4)
+        connection = sqlite3.connect(":memory:")
+        fwf_to_sqlite(
+            spec_path=VALID_SPEC_FILE,
+            fwf_path=VALID_FWF_FILE,
+            db_path=connection,
+            table="feed",
+        )
+        rows = list(read_fwf(spec_path=VALID_SPEC_FILE, fwf_path=VALID_FWF_FILE))
+        loaded = connection.execute("SELECT * FROM feed").fetchall()
+        assert [list(row) for row in loaded] == rows[1:]
+        names = [col[0] for col in connection.execute("SELECT * FROM feed").description]
+        assert names == rows[0]
+        assert connection.execute("PRAGMA synchronous").fetchone()[0] == 2
+
+    def test_fwf_to_sqlite_types(self):
+        change_these_in_valid_specs(EBCDIC_SPECS)
+        with open(TMP_DAT, "wb") as t:
+            t.write("ab".encode("cp037") + b"\x40\x40\x12\x34\x5d" + b"\xf0\xf4\xc2")
+        if os.path.isfile(TMP_DB):
+            os.remove(TMP_DB)
+        for _ in range(2):
+            fwf_to_sqlite(
+                spec_path=TMP_SPECS, fwf_path=TMP_DAT, db_path=TMP_DB, table="t"
+            )
+        connection = sqlite3.connect(TMP_DB)
+        assert connection.execute("SELECT * FROM t").fetchall() == [
+            ("ab", -123.45, 42),
+            ("ab", -123.45, 42),
+        ]
+        with pytest.raises(ValueError):
+            fwf_to_sqlite(
+                spec_path=TMP_SPECS,
+                fwf_path=TMP_DAT,
+                db_path=TMP_DB,
+                table="t",
+                if_exists="fail",
+            )
+        fwf_to_sqlite(
+            spec_path=TMP_SPECS,
+            fwf_path=TMP_DAT,
+            db_path=TMP_DB,
+            table="t",
+            if_exists="replace",
+        )
+        assert connection.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+
+    def test_fwf_to_sqlite_wide_decimals(self):
+        change_these_in_valid_specs(
+            {
+                **EBCDIC_SPECS,
+                "Offsets": ["4", "10", "3"],
+                "ColumnScales": ["0", "2", "0"],
+            }
+        )
+        record = "ab".encode("cp037") + b"\x40\x40"
+        record += _encode_packed("-12345678901234567.89", 10, scale=2)
+        record += b"\xf0\xf4\xc2"
+        connection = sqlite3.connect(":memory:")
+        fwf_to_sqlite(spec_path=TMP_SPECS, fwf_path=record, db_path=connection, table="t")
+        assert connection.execute("SELECT amt, cnt FROM t").fetchall() == [
+            ("-12345678901234567.89", 42)
+        ]
+
+    def test_main_to_sqlite(self):
+        if os.path.isfile(TMP_DB):
+            os.remove(TMP_DB)
+        main(spec=VALID_SPEC_FILE, fwf=VALID_FWF_FILE, output=TMP_DB, to="sqlite")
+        connection = sqlite3.connect(TMP_DB)
+        assert connection.execute("SELECT COUNT(*) FROM fwf").fetchone()[0] == 10
+
+
+class TestDiff:
+    OLD = b"id val \n1  aaaa\n2  bbbb\n3  cccc\n"
+    NEW = b"id val \n1  aaaa\n4  dddd\n2  BBBB\n"
+
+    def diff(self, key=None, **kwargs):
+        change_these_in_valid_specs({"ColumnNames": ["id", "val"], "Offsets": [3, 4]})
+        outputs = [io.BytesIO() for _ in range(3)]
+        counts = diff_fwf(
+            TMP_SPECS, self.OLD, io.BytesIO(self.NEW), key, *outputs, **kwargs
+        )
+        return counts, [sorted(o.getvalue().splitlines()) for o in outputs]
+
+    def test_diff_keyed(self):
+        counts, (inserts, deletes, updates) = self.diff(key=["id"])
+        assert counts == {"inserts": 1, "deletes": 1, "updates": 1}
+        assert inserts == [b"4  dddd", b"id val "]
+        assert deletes == [b"3  cccc", b"id val "]
+        assert updates == [b"2  BBBB", b"id val "]
+
+    def test_diff_records(self):
+        counts, (inserts, deletes, updates) = self.diff()
+        assert counts == {"inserts": 2, "deletes": 2, "updates": 0}
+        assert inserts == [b"2  BBBB", b"4  dddd", b"id val "]
+        assert deletes == [b"2  bbbb", b"3  cccc", b"id val "]
+
+    def test_diff_spilled(self, monkeypatch):
+        monkeypatch.setattr(records, "PARTITIONS", 2)
+        assert self.diff(key=["id"], memory_limit=1) == self.diff(key=["id"])
+        assert self.diff(memory_limit=1) == self.diff()
+
+    def test_diff_invalid_key(self):
+        with pytest.raises(ValueError):
+            self.diff(key=["nope"])
+
+    def test_diff_ebcdic(self):
+        change_these_in_valid_specs(EBCDIC_SPECS)
+        old = "ab".encode("cp037") + b"\x40\x40\x12\x34\x5d" + b"\xf0\xf4\xc2"
+        new = "ab".encode("cp037") + b"\x40\x40\x12\x34\x5c" + b"\xf0\xf4\xc2"
+        updates = io.BytesIO()
+        counts = diff_fwf(
+            TMP_SPECS, old, new, ["name"], io.BytesIO(), io.BytesIO(), updates
+        )
+        assert counts["updates"] == 1 and updates.getvalue() == new
+
+    def test_main_diff(self):
+        counts = main(
+            spec=VALID_SPEC_FILE, fwf=VALID_FWF_FILE, diff=VALID_FWF_FILE, key=["f1"]
+        )
+        assert counts == {"inserts": 0, "deletes": 0, "updates": 0}
+        for name in ["inserts.txt", "deletes.txt", "updates.txt"]:
+            with open(name, "rb") as output, open(VALID_FWF_FILE, "rb") as v:
+                assert output.read() == v.readline()
+            os.remove(name)
+
+
+class TestProfile:
+    def test_profile_valid_fwf(self):
+        rows = list(read_fwf(spec_path=VALID_SPEC_FILE, fwf_path=VALID_FWF_FILE))[1:]
+        profile = profile_fwf(spec_path=VALID_SPEC_FILE, fwf_path=VALID_FWF_FILE)
+        assert list(profile) == [f"f{nb}" for nb in range(1, 11)]
+        for nb, name in enumerate(profile):
+            values = [row[nb] for row in rows]
+            filled = [value for value in values if value]
+            column = profile[name]
+            assert column["count"] == len(values)
+            assert column["blanks"] == len(values) - len(filled)
+            assert column["min_length"] == min(map(len, filled))
+            assert column["max_length"] == max(map(len, filled))
+            assert column["min"] == min(filled) and column["max"] == max(filled)
+            assert column["distinct"] == len(set(filled))
+
+    def test_profile_sketches(self, monkeypatch):
+        monkeypatch.setattr(profiling, "ROWS_PER_CHUNK", 7)
+        monkeypatch.setattr(profiling, "TOP_CAPACITY", 4)
+        values = [str(nb % 3) if nb % 2 else f"{nb:05d}" for nb in range(1, 20001)]
+        profile = profiling._new_profile("zoned")
+        for at in range(0, len(values), 7):
+            profiling._update_profile(profile, tuple(values[at : at + 7]))  # noqa: E203
+        profile = profiling._finish_profile(profile, top_values=3)
+        assert abs(profile["distinct"] - 10003) < 10003 * 0.05
+        assert sorted(value for value, _ in profile["top_values"]) == ["0", "1", "2"]
+        assert profile["min"] == "0" and profile["max"] == "20000"
+
+    def test_profile_parallel(self, monkeypatch):
+        change_these_in_valid_specs({"IncludeHeader": "False"})
+        generate_fwf_file(spec_path=TMP_SPECS, fwf_path=TMP_DAT, length=500)
+        expected = profile_fwf(spec_path=TMP_SPECS, fwf_path=TMP_DAT)
+        monkeypatch.setattr(profiling, "BYTES_PER_TASK", 64 * 51)
+        profile = profile_fwf(spec_path=TMP_SPECS, fwf_path=TMP_DAT, processes=2)
+        for name, column in profile.items():
+            # NOTE top values of (mostly) unique values depend on how chunks are merged
+            column.pop("top_values"), expected[name].pop("top_values")
+            assert column == expected[name]
+        with pytest.raises(TypeError):
+            profile_fwf(spec_path=TMP_SPECS, fwf_path=b"", processes=2)
+
+    def test_profile_parallel_lines(self, monkeypatch):
+        change_these_in_valid_specs({"IncludeHeader": "False"})
+        with open(VALID_FWF_FILE, "rb") as v:
+            lines = v.read().splitlines()
+        with open(TMP_DAT, "wb") as t:
+            t.write(b"\r\n".join(lines + [b""] + lines * 20) + b"\r\n")
+        expected = profile_fwf(spec_path=TMP_SPECS, fwf_path=TMP_DAT)
+        monkeypatch.setattr(profiling, "BYTES_PER_TASK", 333)
+        profile = profile_fwf(spec_path=TMP_SPECS, fwf_path=TMP_DAT, processes=2)
+        assert profile == expected
+
+    def test_profile_parallel_records(self, monkeypatch):
+        change_these_in_valid_specs(EBCDIC_SPECS)
+        generate_fwf_file(spec_path=TMP_SPECS, fwf_path=TMP_DAT, length=300)
+        expected = profile_fwf(spec_path=TMP_SPECS, fwf_path=TMP_DAT)
+        monkeypatch.setattr(profiling, "BYTES_PER_TASK", 333)
+        profile = profile_fwf(spec_path=TMP_SPECS, fwf_path=TMP_DAT, processes=2)
+        for name, column in profile.items():
+            column.pop("top_values"), expected[name].pop("top_values")
+            assert column == expected[name]
+
+    def test_main_profile(self):
+        main(spec=VALID_SPEC_FILE, fwf=VALID_FWF_FILE, output=TMP_CSV, profile=True)
+        with open(TMP_CSV, "r") as t:
+            assert json.loads(t.read())["f1"]["count"] == 10
+
+
+class TestPartition:
+    HEAD = ["id", "region", "val"]
+    ROWS = [[str(nb), ["north", "", "a/b"][nb % 3], "x" * (nb % 4)] for nb in range(30)]
+
+    def read_parts(self, directory):
+        parts = {}
+        for root, _, files in os.walk(directory):
+            for name in files:
+                path = os.path.join(root, name)
+                with open(path, "r") as part:
+                    parts[os.path.relpath(path, directory)] = part.read().splitlines()
+        return parts
+
+    def test_partition_by(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(utils, "ROWS_PER_BATCH", 4)
+        monkeypatch.setattr(partition, "MAX_OPEN_WRITERS", 1)
+        data_to_csv([self.HEAD] + self.ROWS, tmp_path, sep=",", partition_by=["region"])
+        parts = self.read_parts(tmp_path)
+        assert sorted(parts) == [
+            os.path.join(f"region={value}", "part-00000.csv")
+            for value in ["__HIVE_DEFAULT_PARTITION__", "a%2Fb", "north"]
+        ]
+        north = parts[os.path.join("region=north", "part-00000.csv")]
+        assert north[0] == "id,val"
+        assert north[1:] == [
+            f"{row[0]},{row[2]}" for row in self.ROWS if row[1] == "north"
+        ]
+
+    def test_max_rows_per_file(self, tmp_path):
+        data_to_csv(
+            [self.HEAD] + self.ROWS,
+            tmp_path,
+            partition_by=["region"],
+            max_rows_per_file=4,
+        )
+        parts = self.read_parts(tmp_path)
+        assert len(parts) == 9
+        assert all(
+            len(lines) <= 5 and lines[0] == "id\tval" for lines in parts.values()
+        )
+        assert sum(len(lines) - 1 for lines in parts.values()) == len(self.ROWS)
+
+    def test_max_bytes_per_file(self, tmp_path):
+        data_to_csv(
+            (row for row in [self.HEAD] + self.ROWS),
+            tmp_path,
+            header=False,
+            max_bytes_per_file=20,
+        )
+        parts = self.read_parts(tmp_path)
+        assert all(os.path.getsize(tmp_path / name) <= 20 for name in parts)
+        assert list(chain(*(parts[name] for name in sorted(parts)))) == [
+            "\t".join(row) for row in self.ROWS
+        ]
+
+    def test_fwf_to_csv_partitioned(self, tmp_path):
+        fwf_to_csv(
+            spec_path=VALID_SPEC_FILE,
+            fwf_path=VALID_FWF_FILE,
+            csv_path=tmp_path,
+            max_rows_per_file=3,
+        )
+        parts = self.read_parts(tmp_path)
+        assert sorted(parts) == [f"part-0000{nb}.csv" for nb in range(4)]
+        with open(VALID_CSV_FILE, "r") as v:
+            rows = v.read().splitlines()
+        assert list(chain(*(parts[name][1:] for name in sorted(parts)))) == rows[1:]
+        with open(VALID_FWF_FILE, "rb") as v:
+            fwf = v.read() + b"\n"
+        fwf_to_csv(VALID_SPEC_FILE, fwf, tmp_path / "f1", partition_by=["f1"])
+        assert len(self.read_parts(tmp_path / "f1")) == len(rows) - 1
+        with pytest.raises(ValueError, match="not empty"):
+            fwf_to_csv(VALID_SPEC_FILE, VALID_FWF_FILE, tmp_path, max_rows_per_file=3)
+        with pytest.raises(ValueError):
+            fwf_to_csv(VALID_SPEC_FILE, VALID_FWF_FILE, tmp_path, partition_by=["f0"])
+        with pytest.raises(TypeError):
+            fwf_to_csv(
+                VALID_SPEC_FILE, VALID_FWF_FILE, io.BytesIO(), partition_by=["f1"]
+            )
+
+
+class TestDedupe:
+    FWF = b"id val \n1  aaaa\n2  bbbb\n1  aaaa\n3  cccc\n2  BBBB\n4  dddd\n3  cccc\n"
+
+    def read(self, **kwargs):
+        change_these_in_valid_specs({"ColumnNames": ["id", "val"], "Offsets": [3, 4]})
+        return list(read_fwf(spec_path=TMP_SPECS, fwf_path=self.FWF, **kwargs))
+
+    def test_dedupe_records(self):
+        rows = self.read(dedupe=True)
+        assert rows[0] == ["id", "val"]
+        assert rows[1:] == [
+            ["1", "aaaa"],
+            ["2", "bbbb"],
+            ["3", "cccc"],
+            ["2", "BBBB"],
+            ["4", "dddd"],
+        ]
+
+    def test_dedupe_keys(self):
+        rows = self.read(dedupe_keys=["id"])
+        assert rows[1:] == [["1", "aaaa"], ["2", "bbbb"], ["3", "cccc"], ["4", "dddd"]]
+        with pytest.raises(ValueError):
+            self.read(dedupe_keys=["nope"])
+
+    def test_dedupe_spilled(self, monkeypatch):
+        expected = [self.read(dedupe=True), self.read(dedupe_keys=["id"])]
+        monkeypatch.setattr(dedupe, "DEDUPE_MEMORY_LIMIT", 2 * records.BYTES_PER_KEY)
+        monkeypatch.setattr(records, "PARTITIONS", 2)
+        assert [self.read(dedupe=True), self.read(dedupe_keys=["id"])] == expected
+
+    def test_dedupe_spilled_order(self, monkeypatch):
+        monkeypatch.setattr(dedupe, "DEDUPE_MEMORY_LIMIT", 3 * records.BYTES_PER_KEY)
+        monkeypatch.setattr(records, "PARTITIONS", 2)
+        pairs = [
+            (records._fingerprint(b"%d" % (nb % 50)), b"%d" % nb) for nb in range(200)
+        ]
+        unique = list(dedupe._unique_records(pairs, max_keys=3))
+        assert unique == [b"%d" % nb for nb in range(50)]
+
+    def test_dedupe_ebcdic(self):
+        change_these_in_valid_specs(EBCDIC_SPECS)
+        record = "ab".encode("cp037") + b"\x40\x40\x12\x34\x5d" + b"\xf0\xf4\xc2"
+        rows = list(read_fwf(spec_path=TMP_SPECS, fwf_path=record * 3, dedupe=True))
+        assert rows[1:] == [["ab", "-123.45", "42"]]
+
+    def test_fwf_to_csv_dedupe(self):
+        with open(VALID_FWF_FILE, "rb") as v:
+            head, *lines = v.read().splitlines(keepends=True)
+        sink = io.BytesIO()
+        fwf = b"".join([head] + lines + lines[::-1])
+        fwf_to_csv(VALID_SPEC_FILE, fwf, sink, dedupe_keys=["f1", "f2"])
+        with open(VALID_CSV_FILE, "rb") as v:
+            assert sink.getvalue() == v.read()
+
+    def test_main_dedupe(self):
+        main(spec=VALID_SPEC_FILE, fwf=VALID_FWF_FILE, output=TMP_CSV, dedupe=True)
+        assert are_these_same(VALID_CSV_FILE, TMP_CSV)